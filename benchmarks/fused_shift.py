@@ -0,0 +1,75 @@
+# 合并位移内核的性能对比
+# 对比 unicode_shift 的合并内核与原来"先位移再变换/先变换再位移"两步实现的吞吐量。
+# 两步实现也是 tests/test_fused_shift.py 穷举验证时的参照，只用公开的
+# key_transform.encrypt_with_key/decrypt_with_key 和基础位移。
+#
+# 用法：python -m benchmarks.fused_shift [--repeat N]
+
+import argparse
+import random
+import time
+
+from crypto import key_transform, unicode_shift
+
+KEY = 'Bench2024Key'
+
+SIZES = (1000, 100000, 1000000)
+
+
+def shift(text, offset, full_unicode=False):
+    """基础Unicode位移（全码位模式下在标量下标空间内循环位移）"""
+    if full_unicode:
+        return key_transform.shift_scalars(text, offset)
+    return ''.join(chr(ord(c) + offset) for c in text)
+
+
+def encrypt_two_pass(text, key, engine=None, start=0, full_unicode=False):
+    """先位移再做密钥变换的原始实现"""
+    result = shift(text, unicode_shift.OFFSET, full_unicode)
+    if key:
+        result = key_transform.encrypt_with_key(result, key, engine=engine, start=start,
+                                                full_unicode=full_unicode)
+    return result
+
+
+def decrypt_two_pass(text, key, engine=None, start=0, full_unicode=False):
+    """先做密钥解密再位移的原始实现"""
+    if key:
+        text = key_transform.decrypt_with_key(text, key, engine=engine, start=start,
+                                              full_unicode=full_unicode)
+    return shift(text, -unicode_shift.OFFSET, full_unicode)
+
+
+def best_time(func, text, repeat):
+    """
+    返回多次运行中的最短耗时（秒）
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text, KEY)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='合并位移内核的性能对比')
+    parser.add_argument('--repeat', type=int, default=3, help='每项性能测试重复次数，取最短耗时')
+    args = parser.parse_args(argv)
+
+    pool = 'abcdefghijklmnopqrstuvwxyz0123456789 ，。加密解密测试中文字符'
+    rng = random.Random(2024)
+    print(f"{'长度':>10} {'方向':>4} {'两步':>12} {'合并':>12}")
+    for size in SIZES:
+        text = ''.join(rng.choice(pool) for _ in range(size))
+        cipher = unicode_shift.encrypt(text, KEY)
+        for label, two_pass, fused, sample in (
+            ('加密', encrypt_two_pass, unicode_shift.encrypt, text),
+            ('解密', decrypt_two_pass, unicode_shift.decrypt, cipher),
+        ):
+            cells = [f'{size / best_time(func, sample, args.repeat) / 1e6:9.2f}M/s' for func in (two_pass, fused)]
+            print(f"{size:>10} {label:>4} " + ' '.join(f'{c:>12}' for c in cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# 密钥生成的唯一性与吞吐量测试
+# 对比原来基于时间种子的逐字符实现、单个生成、批量生成和密钥池取用，
+# 报告每秒生成的密钥数以及连续生成时的重复数。
+#
+# 用法：python -m benchmarks.keygen [--count N] [--length L]
+
+import argparse
+import random
+import string
+import time
+
+from crypto import key_transform, keygen
+
+
+def legacy_generate_random_key(length=16):
+    """
+    原来的实现：每次用当前时间（微秒）重新设置全局随机种子，逐字符选取，再修补缺少的字符类别
+    同一微秒内的连续调用会得到相同的密钥
+    """
+    random.seed(int(time.time() * 1000000) % 2147483647)
+    chars = string.ascii_letters + string.digits
+    key = ''.join(random.choice(chars) for _ in range(length))
+    if not any(c.isdigit() for c in key):
+        key = key[:-1] + random.choice(string.digits)
+    if not any(c.isalpha() for c in key):
+        key = key[:-1] + random.choice(string.ascii_letters)
+    return key
+
+
+def run(name, func, count):
+    """
+    调用func生成count个密钥，返回(名称, 每秒密钥数, 重复数, 无效数)
+    """
+    start = time.perf_counter()
+    keys = func(count)
+    seconds = time.perf_counter() - start
+    invalid = sum(1 for key in keys if not key_transform.validate_key(key)[0])
+    return name, count / seconds, count - len(set(keys)), invalid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='密钥生成的唯一性与吞吐量测试')
+    parser.add_argument('--count', type=int, default=100000, help='每种方式生成的密钥数')
+    parser.add_argument('--length', type=int, default=16, help='密钥长度')
+    args = parser.parse_args(argv)
+    length = args.length
+
+    pool = keygen.KeyPool(size=args.count)
+    pool.prefill(length)
+    while pool.available(length) < args.count:
+        time.sleep(0.01)
+
+    cases = [
+        ('原实现（逐个）', lambda n: [legacy_generate_random_key(length) for _ in range(n)]),
+        ('generate_random_key', lambda n: [key_transform.generate_random_key(length) for _ in range(n)]),
+        ('generate_keys（批量）', lambda n: keygen.generate_keys(n, length)),
+        ('KeyPool.get', lambda n: [pool.get(length) for _ in range(n)]),
+    ]
+    print(f"{'方式':<24}{'密钥/秒':>14}{'重复':>10}{'无效':>8}")
+    for name, func in cases:
+        name, rate, duplicates, invalid = run(name, func, args.count)
+        print(f"{name:<24}{rate:>14.0f}{duplicates:>10}{invalid:>8}")
+    pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+# crypto 包基准测试
+# 覆盖各算法的加密/解密，不同输入规模、字符集、是否使用密钥以及全码位模式，
+# 报告吞吐量（字符/秒）和峰值内存，结果写入JSON，可与历史结果对比发现性能回退。
+# 不依赖PyQt5，可在无显示环境运行。
+#
+# 用法：
+#   python -m benchmarks.suite -o results.json
+#   python -m benchmarks.suite --full -o results.json            # 包含10MB、100MB
+#   python -m benchmarks.suite --compare baseline.json -o new.json
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from crypto import key_transform
+from crypto import registry
+from crypto import vectorized
+
+KEY = 'Bench2024Key'
+
+DEFAULT_SIZES = (10, 1000, 100000, 1000000)
+FULL_SIZES = DEFAULT_SIZES + (10000000, 100000000)
+
+CHARSETS = {
+    'ascii': ''.join(chr(c) for c in range(32, 127)),
+    'cjk': ''.join(chr(c) for c in range(0x4E00, 0x4E00 + 2000)),
+    'mixed': ''.join(chr(c) for c in range(32, 127)) + '，。！？你好世界加密解密测试中文字符\n',
+}
+
+# 生成长文本时先生成该长度的随机块，再重复拼接
+BLOCK_SIZE = 65536
+
+
+def encodable_charset(charset, key):
+    """
+    密钥变换后在任何槽位都不产生代理项的字符
+    Base64默认模式要把密钥变换结果编码为UTF-8，含代理项时无法编码，带密钥的测试只用这些字符
+    """
+    chars = CHARSETS[charset]
+    slots = key_transform.get_key_plan(key).size
+    mapped = [key_transform.encrypt_with_key(chars, key, start=k) for k in range(slots)]
+    return ''.join(c for i, c in enumerate(chars)
+                   if not any(key_transform.SURROGATE_START <= ord(m[i]) < key_transform.SURROGATE_END
+                              for m in mapped))
+
+
+def make_text(charset, size, seed=2024, chars=None):
+    """
+    生成指定字符集和长度的确定性测试文本
+    :param chars: 实际使用的字符（默认为字符集的全部字符）
+    """
+    rng = random.Random(seed)
+    block = ''.join(rng.choices(chars or CHARSETS[charset], k=min(size, BLOCK_SIZE)))
+    repeat, rest = divmod(size, len(block))
+    return block * repeat + block[:rest]
+
+
+def variants(info):
+    """
+    算法的测试组合：(密钥, 是否全码位模式)
+    """
+    result = [(None, False), (KEY, False)]
+    if info.has_flag(registry.FLAG_FULL_UNICODE):
+        result += [(None, True), (KEY, True)]
+    return result
+
+
+def measure(func, arg, repeat):
+    """
+    返回多次运行的最短耗时（秒）和最后一次的结果
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        result = None
+        start = time.perf_counter()
+        result = func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure_peak(func, arg):
+    """
+    用tracemalloc测量单次运行的峰值内存（字节）
+    """
+    tracemalloc.start()
+    try:
+        func(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def repeat_for(size):
+    """
+    小输入多跑几次以降低计时误差
+    """
+    if size <= 1000:
+        return 50
+    if size <= 100000:
+        return 5
+    return 1
+
+
+def run_suite(sizes, charsets, codecs, with_memory=True, log=sys.stderr):
+    results = []
+    for info in codecs:
+        codec = info.codec
+        # 密文只含ASCII的算法（Base64）在默认模式下要把密钥变换结果编码为UTF-8，输入限制为可编码的字符
+        restricted = info.has_flag(registry.FLAG_ASCII_OUTPUT)
+        for charset in charsets:
+            safe_chars = encodable_charset(charset, KEY) if restricted else None
+            for size in sizes:
+                for key, full_unicode in variants(info):
+                    chars = safe_chars if key and not full_unicode else None
+                    text = make_text(charset, size, chars=chars)
+                    repeat = repeat_for(size)
+                    record = {'codec': info.name, 'charset': charset, 'size': size, 'key': key is not None,
+                              'full_unicode': full_unicode}
+                    label = (f"{info.name:8} {charset:6} {size:>10} key={key is not None!s:5} "
+                             f"{'full' if full_unicode else 'bmp':4}")
+                    try:
+                        enc_seconds, cipher = measure(lambda t: codec.encrypt(t, key, full_unicode=full_unicode),
+                                                      text, repeat)
+                        dec_seconds, _ = measure(lambda t: codec.decrypt(t, key, full_unicode=full_unicode),
+                                                 cipher, repeat)
+                    except Exception as e:
+                        for op in ('encrypt', 'decrypt'):
+                            results.append(dict(record, op=op, error=f'{type(e).__name__}: {e}'))
+                        print(f"{label} 出错: {e}", file=log)
+                        continue
+
+                    for op, seconds, func, arg in (
+                            ('encrypt', enc_seconds, codec.encrypt, text),
+                            ('decrypt', dec_seconds, codec.decrypt, cipher)):
+                        entry = dict(record, op=op, seconds=seconds,
+                                     chars_per_sec=size / seconds if seconds else None)
+                        if with_memory:
+                            entry['peak_bytes'] = measure_peak(lambda t: func(t, key, full_unicode=full_unicode),
+                                                               arg)
+                        results.append(entry)
+                        peak = f"{entry['peak_bytes'] / 1e6:9.1f}MB" if with_memory else ''
+                        print(f"{label} {op:7} {entry['chars_per_sec'] / 1e6:9.2f}M chars/s {peak}", file=log)
+                    del text, cipher
+    return results
+
+
+def result_id(entry):
+    # 早期结果没有 full_unicode 字段，均为默认模式
+    return (entry['codec'], entry['charset'], entry['size'], entry['key'], entry.get('full_unicode', False),
+            entry['op'])
+
+
+def describe(entry):
+    return (f"{entry['codec']} {entry['charset']} {entry['size']} key={entry['key']} "
+            f"full_unicode={entry.get('full_unicode', False)} {entry['op']}")
+
+
+def compare(baseline, results, threshold, sizes=None, charsets=None, codecs=None):
+    """
+    与基线结果对比
+    :param threshold: 吞吐量下降超过该比例即视为回退
+    :param sizes: 本次测试的输入长度，基线中这些长度的项缺失时视为失败（None表示不限）
+    :param charsets: 本次测试的字符集（None表示不限）
+    :param codecs: 本次测试的算法标识（None表示不限）
+    :return: (回退项列表 [(结果, 比例)], 基线中可测量而本次出错的项, 本次缺失的基线项)
+    """
+    current = {result_id(e): e for e in results}
+    regressions = []
+    errors = []
+    missing = []
+    for old in baseline.get('results', []):
+        if any(scope is not None and old[field] not in scope
+               for field, scope in (('size', sizes), ('charset', charsets), ('codec', codecs))):
+            continue
+        entry = current.get(result_id(old))
+        if entry is None:
+            missing.append(old)
+        elif not old.get('chars_per_sec'):
+            continue
+        elif not entry.get('chars_per_sec'):
+            errors.append(entry)
+        else:
+            ratio = entry['chars_per_sec'] / old['chars_per_sec']
+            if ratio < 1 - threshold:
+                regressions.append((entry, ratio))
+    return regressions, errors, missing
+
+
+def metadata():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': vectorized.np.__version__ if vectorized.is_available() else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='crypto 包基准测试')
+    parser.add_argument('--full', action='store_true', help='包含10MB和100MB输入')
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')], help='自定义输入长度，逗号分隔')
+    parser.add_argument('--charsets', default=','.join(CHARSETS), help='字符集，逗号分隔（ascii,cjk,mixed）')
+    parser.add_argument('--codecs', default=None, help='算法，逗号分隔（默认全部）')
+    parser.add_argument('--no-memory', action='store_true', help='不测量峰值内存（更快）')
+    parser.add_argument('-o', '--output', help='结果JSON文件')
+    parser.add_argument('--compare', metavar='BASELINE', help='与基线JSON对比')
+    parser.add_argument('--threshold', type=float, default=0.10, help='判定回退的吞吐量下降比例（默认0.10）')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+    charsets = args.charsets.split(',')
+    codecs = ([registry.get_codec_info(name) for name in args.codecs.split(',')]
+              if args.codecs else registry.list_codecs())
+
+    results = run_suite(sizes, charsets, codecs, with_memory=not args.no_memory)
+    report = {'meta': metadata(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        # 未指定 --codecs 时不限定算法，基线中的算法被移除也会报告为缺失
+        regressions, errors, missing = compare(baseline, results, args.threshold, sizes, charsets,
+                                               args.codecs.split(',') if args.codecs else None)
+        for entry, ratio in regressions:
+            print(f"性能回退: {describe(entry)} 吞吐量为基线的 {ratio:.0%}", file=sys.stderr)
+        for entry in errors:
+            print(f"基线可测量但本次出错: {describe(entry)} {entry['error']}", file=sys.stderr)
+        for entry in missing:
+            print(f"本次结果缺少基线项: {describe(entry)}", file=sys.stderr)
+        if regressions or errors or missing:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
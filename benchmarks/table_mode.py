@@ -0,0 +1,62 @@
+# 查表模式与算术实现的性能对比
+# 用法：python -m benchmarks.table_mode [--repeat N]
+
+import argparse
+import random
+import time
+
+from crypto import key_transform
+
+KEY = 'Bench2024Key'
+SIZES = (16, 256, 4096, 65536, 1048576)
+
+
+def make_text(length, seed=2024):
+    """
+    生成中英文混合的测试文本
+    """
+    rng = random.Random(seed)
+    pool = 'abcdefghijklmnopqrstuvwxyz0123456789 ，。加密解密测试中文字符'
+    return ''.join(rng.choice(pool) for _ in range(length))
+
+
+def time_engine(text, engine, encrypt, repeat):
+    """
+    返回多次运行中的最短耗时（秒）
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        key_transform.apply_key_transform(text, KEY, encrypt=encrypt, engine=engine)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='查表模式与算术实现的性能对比')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数，取最短耗时')
+    args = parser.parse_args(argv)
+
+    plan = key_transform.get_key_plan(KEY)
+    for encrypt in (True, False):
+        start = time.perf_counter()
+        plan.tables(encrypt)
+        print(f"构建{'加密' if encrypt else '解密'}查找表: {time.perf_counter() - start:.3f}s")
+
+    engines = ['python', 'table']
+    if key_transform.vectorized.is_available():
+        engines.append('numpy')
+
+    print(f"{'长度':>10} {'方向':>4} " + ' '.join(f'{e:>12}' for e in engines))
+    for size in SIZES:
+        text = make_text(size)
+        for encrypt in (True, False):
+            cells = []
+            for engine in engines:
+                seconds = time_engine(text, engine, encrypt, args.repeat)
+                cells.append(f'{size / seconds / 1e6:9.2f}M/s')
+            print(f"{size:>10} {'加密' if encrypt else '解密':>4} " + ' '.join(f'{c:>12}' for c in cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# 命令行入口：python -m crypto
+# 无需图形界面即可加密/解密文件、标准输入或整个目录树
+#
+# 示例：
+#   echo 你好 | python -m crypto encrypt -a base64 -k abc12345
+#   python -m crypto encrypt -r logs/ -o encrypted/ -k abc12345 -j 8
+#   python -m crypto decrypt encrypted/app.log.enc -o app.log -k abc12345
+
+import argparse
+import io
+import os
+import sys
+
+from . import batch, registry, schedules
+from .key_transform import ENGINES
+from .streaming import CHUNK_SIZE, positive_int
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m crypto', description='文本加密/解密命令行工具')
+    parser.add_argument('action', choices=('encrypt', 'decrypt'), help='加密或解密')
+    parser.add_argument('paths', nargs='*', help='输入文件或目录，省略或为 - 时读取标准输入')
+    parser.add_argument('-a', '--algorithm', choices=registry.codec_names(), default='unicode',
+                        help='加密算法（默认 unicode）')
+    parser.add_argument('-k', '--key', help='可选密钥（8-32位数字+字母组合）')
+    parser.add_argument('--key-env', metavar='VAR', help='从环境变量读取密钥，避免密钥出现在进程列表中')
+    parser.add_argument('-o', '--output', help='输出文件或目录，省略时写在输入文件旁边（.enc 后缀）')
+    parser.add_argument('-r', '--recursive', action='store_true', help='递归处理目录')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行进程数（默认CPU核数）')
+    parser.add_argument('--full-unicode', action='store_true',
+                        help='全码位模式：emoji等辅助平面字符可精确还原（与默认模式密文不兼容）')
+    parser.add_argument('--schedule', metavar='NAME',
+                        help=f"加密时使用的密钥编排（{'/'.join(schedules.schedule_names())}，可写作 blake2b:64；"
+                             "解密时按密文版本头自动识别）")
+    parser.add_argument('--engine', choices=ENGINES, default=None, help='密钥变换引擎（默认自动选择）')
+    parser.add_argument('--chunk-size', type=positive_int, default=CHUNK_SIZE, help='每块处理的字符数')
+    parser.add_argument('--no-atomic', action='store_true', help='直接写目标文件，不经过临时文件替换')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_intermixed_args(argv)
+    encrypt = args.action == 'encrypt'
+
+    key = args.key
+    if args.key_env:
+        key = os.environ.get(args.key_env)
+        if not key:
+            print(f"环境变量 {args.key_env} 未设置", file=sys.stderr)
+            return 2
+
+    if args.schedule:
+        try:
+            schedules.resolve(args.schedule)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    if args.jobs is not None and args.jobs < 1:
+        print("进程数必须大于0", file=sys.stderr)
+        return 2
+
+    # 标准输入 -> 标准输出（或 -o 指定的文件）
+    if not args.paths or args.paths == ['-']:
+        stdin = io.TextIOWrapper(sys.stdin.buffer, **batch.TEXT_OPTIONS)
+        try:
+            if args.output:
+                with open(args.output, 'w', **batch.TEXT_OPTIONS) as dst:
+                    batch.transform_stream(stdin, dst, args.algorithm, encrypt, key, args.engine, args.chunk_size,
+                                           args.full_unicode, args.schedule)
+            else:
+                stdout = io.TextIOWrapper(sys.stdout.buffer, **batch.TEXT_OPTIONS)
+                batch.transform_stream(stdin, stdout, args.algorithm, encrypt, key, args.engine, args.chunk_size,
+                                       args.full_unicode, args.schedule)
+                stdout.flush()
+                stdout.detach()
+        except Exception as e:
+            print(f"{'加密' if encrypt else '解密'}出错：{e}", file=sys.stderr)
+            return 1
+        finally:
+            stdin.detach()
+        return 0
+
+    try:
+        jobs = batch.collect_jobs(args.paths, encrypt, args.output, args.recursive)
+    except (ValueError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    failures = batch.run_jobs(jobs, args.algorithm, encrypt, key, args.engine, args.chunk_size,
+                              atomic=not args.no_atomic, workers=args.jobs, full_unicode=args.full_unicode,
+                              schedule=args.schedule)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,12 +2,57 @@
 # 加密：文本转为UTF-8字节后Base64编码，解密：Base64解码还原
 # 支持密钥增强加密
 import base64
-from . import key_transform
+import codecs
+import re
+import sys
+from array import array
+from . import instrumentation, key_transform, schedules
+from .bulk import map_by_key, split_joined
+from .streaming import CHUNK_SIZE, iter_chunks, write_stream
 
-def encrypt(text, key=None):
+# b64decode 默认会丢弃Base64字母表以外的字符，流式解密时先做同样的过滤再按4字符对齐
+_NON_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+
+def _encode_text(text):
+    """文本 -> UTF-8 -> Base64"""
+    if not instrumentation.enabled:
+        return base64.b64encode(text.encode('utf-8')).decode('utf-8')
+    started = instrumentation.clock()
+    data = text.encode('utf-8')
+    instrumentation.record('base64.utf8_encode', started, len(text))
+    started = instrumentation.clock()
+    result = base64.b64encode(data).decode('utf-8')
+    instrumentation.record('base64.encode', started, len(data))
+    return result
+
+def _decode_text(text):
+    """Base64 -> UTF-8 -> 文本"""
+    if not instrumentation.enabled:
+        return base64.b64decode(text.encode('utf-8')).decode('utf-8')
+    started = instrumentation.clock()
+    data = base64.b64decode(text.encode('utf-8'))
+    instrumentation.record('base64.decode', started, len(text))
+    started = instrumentation.clock()
+    result = data.decode('utf-8')
+    instrumentation.record('base64.utf8_decode', started, len(data))
+    return result
+
+def _b64encode(data):
+    """Base64编码一段完整的3字节组（流式加密使用）"""
+    if not instrumentation.enabled:
+        return base64.b64encode(data).decode('utf-8')
+    started = instrumentation.clock()
+    result = base64.b64encode(data).decode('utf-8')
+    instrumentation.record('base64.encode', started, len(data))
+    return result
+
+def encrypt(text, key=None, engine=None, full_unicode=False, schedule=None):
     """Base64加密
     :param text: 明文
     :param key: 可选密钥，如果提供则进行密钥增强
+    :param engine: 密钥变换引擎（'python'/'numpy'/'table'），None为自动选择
+    :param full_unicode: 全码位模式，密钥变换结果不含代理项，emoji等字符也能精确还原
+    :param schedule: 密钥编排名称（如 'blake2b:64'），非默认编排会在密文前写入版本头
     :return: 密文
     """
     if not text:
@@ -15,27 +60,235 @@ def encrypt(text, key=None):
     
     # 如果提供了密钥，先进行密钥变换
     if key:
-        text = key_transform.encrypt_with_key(text, key)
+        text = key_transform.encrypt_with_key(text, key, engine=engine, full_unicode=full_unicode,
+                                              schedule=schedule)
+        # 版本头含 '$'，不在Base64字母表中，不会与无版本头的密文混淆
+        return schedules.header(schedule) + _encode_text(text)
     
     # Base64编码
-    result = base64.b64encode(text.encode('utf-8')).decode('utf-8')
-    
-    return result
+    return _encode_text(text)
 
-def decrypt(text, key=None):
+def decrypt(text, key=None, engine=None, full_unicode=False):
     """Base64解密
     :param text: 密文
-    :param key: 可选密钥，如果提供则进行密钥解密
+    :param key: 可选密钥，如果提供则进行密钥解密（密钥编排由密文版本头决定）
+    :param engine: 密钥变换引擎（'python'/'numpy'/'table'），None为自动选择
+    :param full_unicode: 全码位模式，密钥变换结果不含代理项，emoji等字符也能精确还原
     :return: 明文
     """
     if not text:
         return text
     
+    schedule = None
+    if key:
+        schedule, text = schedules.split_header(text)
+    
     # Base64解码
-    result = base64.b64decode(text.encode('utf-8')).decode('utf-8')
+    result = _decode_text(text)
     
     # 如果提供了密钥，进行密钥解密
     if key:
-        result = key_transform.decrypt_with_key(result, key)
+        result = key_transform.decrypt_with_key(result, key, engine=engine, full_unicode=full_unicode,
+                                                schedule=schedule)
+    
+    return result
+
+def encrypt_many(records, key=None, keys=None, engine=None, full_unicode=False):
+    """Base64批量加密，结果与逐条调用 encrypt 一致
+    同一密钥的记录拼接后只做一次密钥变换，再逐条Base64编码
+    :param records: 明文序列，空记录原样返回
+    :param key: 所有记录共用的密钥
+    :param keys: 逐条记录的密钥序列（与 key 二选一），相同密钥的记录会合并处理
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :return: 密文列表
+    """
+    def encrypt_group(texts, group_key):
+        if group_key:
+            lengths = [len(t) for t in texts]
+            joined = key_transform.transform_joined(''.join(texts), lengths, group_key, True, engine, full_unicode)
+            texts = split_joined(joined, lengths)
+        return [_encode_text(t) for t in texts]
+    
+    return map_by_key(records, encrypt_group, key, keys)
+
+def decrypt_many(records, key=None, keys=None, engine=None, full_unicode=False):
+    """Base64批量解密，结果与逐条调用 decrypt 一致
+    :param records: 密文序列，空记录原样返回
+    :param key: 所有记录共用的密钥
+    :param keys: 逐条记录的密钥序列（与 key 二选一）
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :return: 明文列表
+    """
+    def decrypt_group(texts, group_key):
+        texts = [_decode_text(t) for t in texts]
+        if not group_key:
+            return texts
+        lengths = [len(t) for t in texts]
+        joined = key_transform.transform_joined(''.join(texts), lengths, group_key, False, engine, full_unicode)
+        return split_joined(joined, lengths)
+    
+    return map_by_key(records, decrypt_group, key, keys)
+
+def encrypt_bytes(data, key=None, engine=None):
+    """Base64字节加密：字节进、字节出，不经过任何中间字符串
+    每个输入码元参与密钥变换后按定长小端uint16打包，再直接Base64编码，
+    密文比文本接口（变换结果多为3字节UTF-8）更短
+    :param data: bytes/bytearray/memoryview（每个字节是一个码元），
+                 或 str（按UTF-16码元处理，解密时使用 as_text=True）
+    :param key: 可选密钥，不提供时不做变换
+    :param engine: 密钥变换引擎，None为自动选择
+    :return: Base64密文（bytes）
+    """
+    if not data:
+        return b''
+    
+    if isinstance(data, str):
+        raw = data.encode('utf-16-le')
+        if not key:
+            return base64.b64encode(raw)
+        data = array('H')
+        data.frombytes(raw)
+        if sys.byteorder != 'little':
+            data.byteswap()
+    elif not key:
+        return base64.b64encode(data)
+    
+    return base64.b64encode(key_transform.transform_units(data, key, encrypt=True, engine=engine))
+
+def decrypt_bytes(data, key=None, engine=None, as_text=False):
+    """Base64字节解密，encrypt_bytes 的逆操作
+    :param data: Base64密文（bytes类对象或ASCII字符串）
+    :param key: 可选密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param as_text: 加密时输入为str则传True，返回str
+    :return: 明文（bytes，或 as_text=True 时为 str）
+    """
+    if not data:
+        return '' if as_text else b''
+    
+    raw = base64.b64decode(data)
+    if not key:
+        return raw.decode('utf-16-le') if as_text else raw
+    
+    if len(raw) % 2:
+        raise ValueError("密文长度不是2字节的整数倍")
+    units = array('H')
+    units.frombytes(raw)
+    if sys.byteorder != 'little':
+        units.byteswap()
+    
+    result = key_transform.transform_units(units, key, encrypt=False, engine=engine)
+    if as_text:
+        return result.decode('utf-16-le')
+    
+    # 字节明文解密后每个小端uint16码元的高字节必须为0
+    if result[1::2].count(0) != len(result) // 2:
+        raise ValueError("解密结果不是字节数据，请检查密钥是否正确")
+    return result[0::2]
+
+def encrypt_stream(chunks, key=None, engine=None, full_unicode=False, schedule=None):
+    """Base64流式加密
+    :param chunks: 明文块的可迭代对象
+    :param key: 可选密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param schedule: 密钥编排名称，非默认编排时先输出版本头
+    :return: 密文块生成器，拼接结果与 encrypt 完全一致
+    """
+    header = schedules.header(schedule) if key else ''
+    position = 0
+    pending = b''  # 不足3字节、留待下一块一起编码的尾部
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if header:
+            yield header
+            header = ''
+        if key:
+            chunk = key_transform.encrypt_with_key(chunk, key, engine=engine, start=position,
+                                                   full_unicode=full_unicode, schedule=schedule)
+        position += len(chunk)
+        
+        started = instrumentation.clock() if instrumentation.enabled else None
+        data = pending + chunk.encode('utf-8')
+        if started is not None:
+            instrumentation.record('base64.utf8_encode', started, len(chunk))
+        cut = len(data) - len(data) % 3
+        pending = data[cut:]
+        if cut:
+            yield _b64encode(memoryview(data)[:cut])
+    if pending:
+        yield _b64encode(pending)
+
+def decrypt_stream(chunks, key=None, engine=None, full_unicode=False):
+    """Base64流式解密
+    :param chunks: 密文块的可迭代对象
+    :param key: 可选密钥（密钥编排由密文开头的版本头决定）
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :return: 明文块生成器，拼接结果与 decrypt 完全一致
+    """
+    schedule = None
+    if key:
+        # 版本头含 '$' 和 '.'，必须在过滤非Base64字符之前拆下
+        schedule, chunks = schedules.split_stream_header(chunks)
+    position = 0
+    pending = ''  # 不足4字符、留待下一块一起解码的尾部
+    # 跨块的不完整UTF-8序列由增量解码器保留
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    
+    def transform(data, final=False):
+        nonlocal position
+        if instrumentation.enabled:
+            started = instrumentation.clock()
+            raw = base64.b64decode(data)
+            instrumentation.record('base64.decode', started, len(data))
+            started = instrumentation.clock()
+            text = decoder.decode(raw, final)
+            instrumentation.record('base64.utf8_decode', started, len(raw))
+        else:
+            text = decoder.decode(base64.b64decode(data), final)
+        if key and text:
+            text = key_transform.decrypt_with_key(text, key, engine=engine, start=position,
+                                                  full_unicode=full_unicode, schedule=schedule)
+        position += len(text)
+        return text
     
-    return result
\ No newline at end of file
+    for chunk in chunks:
+        data = pending + _NON_BASE64.sub('', chunk)
+        cut = len(data) - len(data) % 4
+        pending = data[cut:]
+        if cut:
+            text = transform(data[:cut])
+            if text:
+                yield text
+    text = transform(pending, final=True)
+    if text:
+        yield text
+
+def encrypt_file(src, dst, key=None, engine=None, chunk_size=CHUNK_SIZE, full_unicode=False, schedule=None):
+    """按块加密文本文件对象
+    :param src: 输入文件对象（文本模式）
+    :param dst: 输出文件对象（文本模式）
+    :param key: 可选密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param chunk_size: 每块读取的字符数
+    :param schedule: 密钥编排名称
+    :return: 写入的字符数
+    """
+    return write_stream(encrypt_stream(iter_chunks(src, chunk_size), key, engine, full_unicode, schedule), dst)
+
+def decrypt_file(src, dst, key=None, engine=None, chunk_size=CHUNK_SIZE, full_unicode=False):
+    """按块解密文本文件对象
+    :param src: 输入文件对象（文本模式）
+    :param dst: 输出文件对象（文本模式）
+    :param key: 可选密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param chunk_size: 每块读取的字符数
+    :return: 写入的字符数
+    """
+    return write_stream(decrypt_stream(iter_chunks(src, chunk_size), key, engine, full_unicode), dst)
@@ -0,0 +1,166 @@
+# 批量文件加解密
+# 供命令行入口使用，不依赖任何图形界面模块，可在无显示环境的服务器上运行
+# 文件按块流式处理，多个文件分发到进程池并行执行
+
+import os
+import stat
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import registry
+from .streaming import CHUNK_SIZE
+
+# 加密输出文件的默认后缀
+ENCRYPTED_SUFFIX = '.enc'
+
+# 文本读写参数：保留原始换行符，并允许密文中的孤立代理项往返
+TEXT_OPTIONS = {'encoding': 'utf-8', 'newline': '', 'errors': 'surrogatepass'}
+
+def transform_stream(src, dst, algorithm, encrypt=True, key=None, engine=None, chunk_size=CHUNK_SIZE,
+                     full_unicode=False, schedule=None):
+    """
+    对文本流进行分块加密或解密
+    :param schedule: 加密时使用的密钥编排名称（解密时按密文版本头识别）
+    :return: 写入的字符数
+    """
+    info = registry.get_codec_info(algorithm)
+    if not info.streaming:
+        raise ValueError(f"算法 {algorithm} 不支持流式处理")
+    codec = info.codec
+    if not encrypt:
+        return codec.decrypt_file(src, dst, key=key, engine=engine, chunk_size=chunk_size, full_unicode=full_unicode)
+    if schedule and not info.has_flag(registry.FLAG_SCHEDULE):
+        raise ValueError(f"算法 {algorithm} 不支持选择密钥编排")
+    options = {'schedule': schedule} if schedule else {}
+    return codec.encrypt_file(src, dst, key=key, engine=engine, chunk_size=chunk_size, full_unicode=full_unicode,
+                              **options)
+
+def output_mode(dst_path):
+    """
+    输出文件应有的权限：目标已存在时沿用其权限，否则为按当前umask新建文件的默认权限
+    （与非原子写入时直接打开目标文件的结果一致；mkstemp 创建的临时文件固定为0600）
+    """
+    try:
+        return stat.S_IMODE(os.stat(dst_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def process_file(src_path, dst_path, algorithm, encrypt=True, key=None, engine=None,
+                 chunk_size=CHUNK_SIZE, atomic=True, full_unicode=False, schedule=None):
+    """
+    加密或解密单个文件
+    :param src_path: 输入文件路径
+    :param dst_path: 输出文件路径
+    :param atomic: True时先写入同目录临时文件，完成后再原子替换目标文件
+    :param schedule: 加密时使用的密钥编排名称
+    :return: (输入路径, 写入的字符数)
+    """
+    dst_dir = os.path.dirname(os.path.abspath(dst_path))
+    os.makedirs(dst_dir, exist_ok=True)
+
+    if not atomic and os.path.exists(dst_path) and os.path.samefile(src_path, dst_path):
+        # 直接以写模式打开目标文件会在读取前清空输入
+        raise ValueError(f"输出文件与输入文件相同: {dst_path}，请使用原子写入或指定其他输出路径")
+
+    with open(src_path, 'r', **TEXT_OPTIONS) as src:
+        if not atomic:
+            with open(dst_path, 'w', **TEXT_OPTIONS) as dst:
+                written = transform_stream(src, dst, algorithm, encrypt, key, engine, chunk_size, full_unicode,
+                                           schedule)
+            return src_path, written
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(dst_path) + '.', suffix='.tmp', dir=dst_dir)
+        try:
+            with open(fd, 'w', **TEXT_OPTIONS) as dst:
+                written = transform_stream(src, dst, algorithm, encrypt, key, engine, chunk_size, full_unicode,
+                                           schedule)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.chmod(tmp_path, output_mode(dst_path))
+            os.replace(tmp_path, dst_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return src_path, written
+
+def output_path(src_path, encrypt, root=None, output_dir=None):
+    """
+    计算输出文件路径
+    加密时追加 .enc 后缀；解密时去掉 .enc 后缀（没有则追加 .dec）
+    指定 output_dir 时按相对 root 的路径镜像目录结构
+    """
+    if encrypt:
+        name = src_path + ENCRYPTED_SUFFIX
+    elif src_path.endswith(ENCRYPTED_SUFFIX):
+        name = src_path[:-len(ENCRYPTED_SUFFIX)]
+    else:
+        name = src_path + '.dec'
+    if output_dir is None:
+        return name
+    rel = os.path.relpath(name, root) if root else os.path.basename(name)
+    return os.path.join(output_dir, rel)
+
+def collect_jobs(paths, encrypt, output=None, recursive=False):
+    """
+    展开输入路径，生成 (输入文件, 输出文件) 列表
+    :param paths: 文件或目录路径列表
+    :param output: 输出文件或目录；多个输入或目录输入时视为目录
+    :param recursive: 是否递归处理目录
+    :return: 任务列表
+    """
+    jobs = []
+    single_file = len(paths) == 1 and os.path.isfile(paths[0])
+    for path in paths:
+        if os.path.isdir(path):
+            if not recursive:
+                raise ValueError(f"{path} 是目录，请使用 -r 递归处理")
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    src = os.path.join(dirpath, filename)
+                    jobs.append((src, output_path(src, encrypt, path, output)))
+        elif os.path.isfile(path):
+            if single_file and output and not os.path.isdir(output):
+                jobs.append((path, output))
+            else:
+                jobs.append((path, output_path(path, encrypt, None, output)))
+        else:
+            raise FileNotFoundError(f"找不到文件: {path}")
+    return jobs
+
+def run_jobs(jobs, algorithm, encrypt=True, key=None, engine=None, chunk_size=CHUNK_SIZE,
+             atomic=True, workers=None, full_unicode=False, schedule=None, log=sys.stderr):
+    """
+    执行批量任务，多个文件时分发到进程池
+    :param workers: 进程数，None为CPU核数，1为在当前进程中顺序执行
+    :return: 失败的任务数
+    """
+    options = dict(algorithm=algorithm, encrypt=encrypt, key=key, engine=engine,
+                   chunk_size=chunk_size, atomic=atomic, full_unicode=full_unicode, schedule=schedule)
+    failures = 0
+
+    if workers == 1 or len(jobs) <= 1:
+        for src, dst in jobs:
+            try:
+                process_file(src, dst, **options)
+                print(f"{src} -> {dst}", file=log)
+            except Exception as e:
+                failures += 1
+                print(f"处理失败 {src}: {e}", file=log)
+        return failures
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_file, src, dst, **options): (src, dst) for src, dst in jobs}
+        for future in as_completed(futures):
+            src, dst = futures[future]
+            try:
+                future.result()
+                print(f"{src} -> {dst}", file=log)
+            except Exception as e:
+                failures += 1
+                print(f"处理失败 {src}: {e}", file=log)
+    return failures
@@ -0,0 +1,55 @@
+# 批量加解密辅助函数
+# 把大量短记录按密钥分组，每组拼接成一段文本只做一次变换，再按记录长度切回
+# 各算法的 encrypt_many/decrypt_many 基于这里实现
+
+def split_joined(text, lengths):
+    """
+    按记录长度切分拼接文本
+    :param text: 拼接文本
+    :param lengths: 各记录长度
+    :return: 记录列表
+    """
+    pieces = []
+    offset = 0
+    for length in lengths:
+        pieces.append(text[offset:offset + length])
+        offset += length
+    return pieces
+
+def resolve_keys(count, key=None, keys=None):
+    """
+    确定每条记录使用的密钥
+    :param count: 记录数
+    :param key: 所有记录共用的密钥
+    :param keys: 逐条记录的密钥序列，与 key 二选一
+    :return: 密钥列表
+    """
+    if keys is None:
+        return [key] * count
+    if key is not None:
+        raise ValueError("key 与 keys 只能提供一个")
+    keys = list(keys)
+    if len(keys) != count:
+        raise ValueError(f"密钥数量 {len(keys)} 与记录数量 {count} 不一致")
+    return keys
+
+def map_by_key(records, func, key=None, keys=None):
+    """
+    按密钥分组批量处理记录，空记录原样返回
+    :param records: 记录序列
+    :param func: func(同组记录列表, 密钥) -> 等长的结果列表，密钥可能为None（无密钥）
+    :param key: 所有记录共用的密钥
+    :param keys: 逐条记录的密钥序列
+    :return: 与 records 一一对应的结果列表
+    """
+    records = list(records)
+    groups = {}
+    for i, (record, record_key) in enumerate(zip(records, resolve_keys(len(records), key, keys))):
+        if record:
+            groups.setdefault(record_key or None, []).append(i)
+
+    results = list(records)
+    for group_key, indexes in groups.items():
+        for i, result in zip(indexes, func([records[i] for i in indexes], group_key)):
+            results[i] = result
+    return results
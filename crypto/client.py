@@ -0,0 +1,145 @@
+# 加解密服务客户端
+# 与 crypto.service 配套，维护一个连接池，每个连接上可流水线发送多个请求
+#
+#   async with CryptoClient(path='/tmp/crypto.sock', pool_size=4) as client:
+#       cipher = await client.encrypt('你好', codec='base64', key='abc12345')
+#       plain = await client.decrypt(cipher, codec='base64', key='abc12345')
+#       cipher = await client.encrypt('你好', key='abc12345', schedule='blake2b:64')
+
+import asyncio
+import itertools
+
+from .service import DEFAULT_PORT, ProtocolError, encode_frame, read_frame
+
+class ServiceError(Exception):
+    """服务端返回的错误"""
+
+class _Connection:
+    """单个连接：后台任务读取响应，并按id分发给等待中的请求"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiters = {}
+        self.write_lock = asyncio.Lock()
+        self.reader_task = asyncio.ensure_future(self._read_loop())
+
+    @property
+    def closed(self):
+        return self.reader_task.done()
+
+    async def _read_loop(self):
+        error = ConnectionError("连接已关闭")
+        try:
+            while True:
+                message = await read_frame(self.reader)
+                if message is None:
+                    break
+                future = self.waiters.pop(message.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (ConnectionError, ProtocolError, asyncio.IncompleteReadError) as e:
+            error = e
+        finally:
+            for future in self.waiters.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.waiters.clear()
+
+    async def request(self, message):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[message['id']] = future
+        try:
+            async with self.write_lock:
+                self.writer.write(encode_frame(message))
+                await self.writer.drain()
+        except Exception:
+            self.waiters.pop(message['id'], None)
+            raise
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self.reader_task.cancel()
+
+class CryptoClient:
+    """
+    加解密服务的连接池客户端
+    :param path: Unix域套接字路径，提供时忽略host/port
+    :param host: TCP地址
+    :param port: TCP端口
+    :param pool_size: 连接数，请求轮流分配到各连接
+    """
+
+    def __init__(self, path=None, host='127.0.0.1', port=DEFAULT_PORT, pool_size=4):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self._pool = [None] * pool_size
+        self._next_slot = itertools.cycle(range(pool_size))
+        self._ids = itertools.count(1)
+        self._connect_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _open(self):
+        if self.path:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        return _Connection(reader, writer)
+
+    async def _connection(self):
+        """取下一个连接，断开的连接会重新建立"""
+        slot = next(self._next_slot)
+        conn = self._pool[slot]
+        if conn is None or conn.closed:
+            async with self._connect_lock:
+                conn = self._pool[slot]
+                if conn is None or conn.closed:
+                    conn = self._pool[slot] = await self._open()
+        return conn
+
+    async def call(self, op, **fields):
+        """
+        发送一个请求并等待响应
+        :return: 响应中的 result
+        """
+        message = dict(fields, id=next(self._ids), op=op)
+        conn = await self._connection()
+        response = await conn.request(message)
+        if not response.get('ok'):
+            raise ServiceError(response.get('error'))
+        return response.get('result')
+
+    async def encrypt(self, text, codec='unicode', key=None, full_unicode=False, schedule=None):
+        """
+        加密
+        :param schedule: 密钥编排名称（如 'blake2b:64'），None为默认编排
+        """
+        fields = {'schedule': schedule} if schedule else {}
+        return await self.call('encrypt', codec=codec, text=text, key=key, full_unicode=full_unicode, **fields)
+
+    async def decrypt(self, text, codec='unicode', key=None, full_unicode=False):
+        return await self.call('decrypt', codec=codec, text=text, key=key, full_unicode=full_unicode)
+
+    async def ping(self):
+        return await self.call('ping')
+
+    async def stats(self):
+        return await self.call('stats')
+
+    async def close(self):
+        for i, conn in enumerate(self._pool):
+            if conn is not None:
+                await conn.close()
+                self._pool[i] = None
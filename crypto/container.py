@@ -0,0 +1,292 @@
+# 自描述密文容器
+# 把密文分块封装为带元数据的二进制格式（也可整体Base64编码为文本），解密时不需要再指定算法和密钥编排：
+#
+#   头部  魔数 b'UCTX' | 格式版本 | 算法编号 | 标志 | 密钥编排版本 | 槽位数 | 块大小 | 明文字符数 | 盐 | 密钥指纹
+#   块表  每块一项：密文字节数 | 16字节完整性标签
+#   数据  各块密文依次拼接（UTF-8，允许代理项）
+#
+# 密钥指纹由密钥和随机盐计算，密钥错误时读完头部即可拒绝，不做任何变换；
+# 每块的标签是带密钥的BLAKE2b，覆盖头部、块序号和块密文，块被篡改、调换或截断都能发现；
+# 第i块从明文位置 i * 块大小 开始加密，任意块都能单独校验和解密（随机访问、多线程并行）。
+#
+#   from crypto import container
+#   data = container.pack(text, 'abc12345', codec='unicode', schedule='blake2b:64')
+#   text = container.unpack(data, 'abc12345')
+#   reader = container.ContainerReader(data, 'abc12345')
+#   part = reader.read(1000000, 1000100)
+
+import base64
+import binascii
+import hashlib
+import hmac
+import secrets
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from . import key_transform, schedules, unicode_shift
+
+MAGIC = b'UCTX'
+FORMAT_VERSION = 1
+
+# 默认每块的明文字符数
+DEFAULT_CHUNK_SIZE = 65536
+
+# 容器中的算法编号
+CODEC_IDS = {'unicode': 1, 'base64': 2}
+_CODEC_NAMES = {number: name for name, number in CODEC_IDS.items()}
+
+# 标志位
+_KEYED = 0x01
+_FULL_UNICODE = 0x02
+
+SALT_SIZE = 16
+FINGERPRINT_SIZE = 8
+TAG_SIZE = 16
+
+# 魔数、格式版本、算法编号、标志、编排版本、槽位数、块大小、明文字符数、盐、密钥指纹
+_HEADER = struct.Struct(f'<4sBBBBHIQ{SALT_SIZE}s{FINGERPRINT_SIZE}s')
+# 块表项：密文字节数、标签
+_ENTRY = struct.Struct(f'<I{TAG_SIZE}s')
+
+def _derive(key, salt):
+    """
+    由密钥和盐计算密钥指纹和标签密钥（无密钥时按空密钥计算，标签只用于校验完整性）
+    :return: (指纹, 标签密钥)
+    """
+    data = key.encode('utf-8') if key else b''
+    fingerprint = hashlib.blake2b(data, digest_size=FINGERPRINT_SIZE, salt=salt,
+                                  person=b'uctx-fingerprint').digest()
+    mac_key = hashlib.blake2b(data, digest_size=32, salt=salt, person=b'uctx-mac').digest()
+    return fingerprint, mac_key
+
+def _tag(mac_key, header, index, payload):
+    """块完整性标签：覆盖头部、块序号和块密文"""
+    digest = hashlib.blake2b(key=mac_key, digest_size=TAG_SIZE)
+    digest.update(header)
+    digest.update(struct.pack('<Q', index))
+    digest.update(payload)
+    return digest.digest()
+
+def _seal_chunk(codec, chunk, key, start, engine, full_unicode, schedule):
+    """加密一块明文，start为其在整段明文中的位置"""
+    if codec == 'unicode':
+        text = unicode_shift.encrypt_at(chunk, key, start, engine, full_unicode, schedule)
+    elif key:
+        # base64 算法的密钥变换层；Base64编码由容器整体完成
+        text = key_transform.encrypt_with_key(chunk, key, engine, start, full_unicode, schedule)
+    else:
+        text = chunk
+    return text.encode('utf-8', 'surrogatepass')
+
+def _open_chunk(codec, payload, key, start, engine, full_unicode, schedule):
+    """解密一块密文"""
+    text = str(payload, 'utf-8', 'surrogatepass')
+    if codec == 'unicode':
+        return unicode_shift.decrypt_at(text, key, start, engine, full_unicode, schedule)
+    if key:
+        return key_transform.decrypt_with_key(text, key, engine, start, full_unicode, schedule)
+    return text
+
+def pack(text, key=None, codec='unicode', chunk_size=DEFAULT_CHUNK_SIZE, full_unicode=False, schedule=None,
+         engine=None):
+    """
+    加密并封装为容器
+    :param text: 明文
+    :param key: 可选密钥
+    :param codec: 算法标识（'unicode' 或 'base64'）
+    :param chunk_size: 每块的明文字符数
+    :param full_unicode: 是否使用全码位模式
+    :param schedule: 密钥编排名称，None为默认的md5编排
+    :param engine: 密钥变换引擎，None为自动选择
+    :return: 容器字节串
+    """
+    if codec not in CODEC_IDS:
+        raise ValueError(f"容器不支持算法: {codec}")
+    if not 0 < chunk_size <= 0xFFFFFFFF:
+        raise ValueError(f"块大小超出范围: {chunk_size}")
+    key = key_transform.check_key(key) if key else None
+    if full_unicode:
+        key_transform.check_scalars(text)
+    version, slots = schedules.schedule_id(schedule)
+
+    flags = (_KEYED if key else 0) | (_FULL_UNICODE if full_unicode else 0)
+    salt = secrets.token_bytes(SALT_SIZE)
+    fingerprint, mac_key = _derive(key, salt)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, CODEC_IDS[codec], flags, version, slots,
+                          chunk_size, len(text), salt, fingerprint)
+
+    payloads = [_seal_chunk(codec, text[start:start + chunk_size], key, start, engine, full_unicode, schedule)
+                for start in range(0, len(text), chunk_size)]
+    table = b''.join(_ENTRY.pack(len(payload), _tag(mac_key, header, i, payload))
+                     for i, payload in enumerate(payloads))
+    return b''.join([header, table] + payloads)
+
+def read_header(data):
+    """
+    读取容器头部（不需要密钥，不校验数据）
+    :param data: 容器字节串
+    :return: 头部信息字典
+    """
+    data = memoryview(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("不是有效的密文容器：数据过短")
+    (magic, version, codec_id, flags, schedule_version, slots, chunk_size, length,
+     salt, fingerprint) = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("不是有效的密文容器：魔数不匹配")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"不支持的容器格式版本: {version}")
+    codec = _CODEC_NAMES.get(codec_id)
+    if codec is None:
+        raise ValueError(f"未知的算法编号: {codec_id}")
+    if not chunk_size:
+        raise ValueError("容器块大小为0")
+    return {
+        'codec': codec,
+        'keyed': bool(flags & _KEYED),
+        'full_unicode': bool(flags & _FULL_UNICODE),
+        'schedule': schedules.from_id(schedule_version, slots),
+        'chunk_size': chunk_size,
+        'length': length,
+        'chunks': -(-length // chunk_size),
+        'salt': salt,
+        'fingerprint': fingerprint,
+    }
+
+class ContainerReader:
+    """
+    容器读取器：构造时校验头部和密钥指纹，之后可逐块校验、解密或按字符区间随机读取
+    :param data: 容器字节串（bytes/bytearray/memoryview/mmap）
+    :param key: 加密时使用的密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    """
+
+    def __init__(self, data, key=None, engine=None):
+        self.data = memoryview(data)
+        info = read_header(self.data)
+        self.codec = info['codec']
+        self.full_unicode = info['full_unicode']
+        self.schedule = info['schedule']
+        self.chunk_size = info['chunk_size']
+        self.length = info['length']
+        self.engine = engine
+
+        # 只计算两个短摘要即可拒绝错误的密钥
+        if info['keyed'] and not key:
+            raise ValueError("该密文使用了密钥，请提供密钥")
+        self.key = key_transform.check_key(key) if info['keyed'] else None
+        fingerprint, self._mac_key = _derive(self.key, info['salt'])
+        if not hmac.compare_digest(fingerprint, info['fingerprint']):
+            raise ValueError("密钥不正确")
+
+        self._header = bytes(self.data[:_HEADER.size])
+        count = info['chunks']
+        table_end = _HEADER.size + _ENTRY.size * count
+        if len(self.data) < table_end:
+            raise ValueError("容器数据不完整：块表被截断")
+        self._entries = []
+        offset = table_end
+        for size, tag in _ENTRY.iter_unpack(self.data[_HEADER.size:table_end]):
+            self._entries.append((offset, size, tag))
+            offset += size
+        if offset != len(self.data):
+            raise ValueError("容器数据长度与块表不一致")
+
+    def __len__(self):
+        """明文字符数"""
+        return self.length
+
+    @property
+    def chunk_count(self):
+        return len(self._entries)
+
+    def verify_chunk(self, index):
+        """
+        校验一块的完整性标签
+        :param index: 块序号
+        :return: 块密文（memoryview）
+        """
+        offset, size, tag = self._entries[index]
+        payload = self.data[offset:offset + size]
+        if not hmac.compare_digest(_tag(self._mac_key, self._header, index, payload), tag):
+            raise ValueError(f"第{index + 1}块校验失败，密文已损坏或被篡改")
+        return payload
+
+    def verify(self):
+        """校验全部块（不解密）"""
+        for index in range(self.chunk_count):
+            self.verify_chunk(index)
+
+    def chunk(self, index):
+        """
+        校验并解密一块
+        :param index: 块序号
+        :return: 该块明文
+        """
+        payload = self.verify_chunk(index)
+        start = index * self.chunk_size
+        text = _open_chunk(self.codec, payload, self.key, start, self.engine, self.full_unicode, self.schedule)
+        if len(text) != min(self.chunk_size, self.length - start):
+            raise ValueError(f"第{index + 1}块长度不正确")
+        return text
+
+    def read(self, start=0, stop=None):
+        """
+        随机读取明文区间，只校验和解密覆盖该区间的块
+        :param start: 起始字符位置
+        :param stop: 结束字符位置（不含），None表示到末尾
+        :return: 明文片段
+        """
+        start, stop, _ = slice(start, stop).indices(self.length)
+        if start >= stop:
+            return ''
+        first = start // self.chunk_size
+        last = (stop - 1) // self.chunk_size
+        text = ''.join(self.chunk(index) for index in range(first, last + 1))
+        offset = first * self.chunk_size
+        return text[start - offset:stop - offset]
+
+    def decrypt(self, workers=None):
+        """
+        校验并解密全部内容
+        :param workers: 并行解密的线程数，None或1时顺序处理
+        :return: 明文
+        """
+        if workers and workers > 1 and self.chunk_count > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return ''.join(executor.map(self.chunk, range(self.chunk_count)))
+        return ''.join(self.chunk(index) for index in range(self.chunk_count))
+
+def unpack(data, key=None, engine=None, workers=None):
+    """
+    校验并解密容器
+    :param data: 容器字节串
+    :param key: 加密时使用的密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param workers: 并行解密的线程数
+    :return: 明文
+    """
+    return ContainerReader(data, key, engine).decrypt(workers)
+
+def encrypt(text, key=None, codec='unicode', chunk_size=DEFAULT_CHUNK_SIZE, full_unicode=False, schedule=None,
+            engine=None):
+    """
+    加密为Base64文本形式的容器，参数同 pack
+    :return: Base64文本
+    """
+    return base64.b64encode(pack(text, key, codec, chunk_size, full_unicode, schedule, engine)).decode('ascii')
+
+def decrypt(text, key=None, engine=None, workers=None):
+    """
+    解密Base64文本形式的容器
+    :param text: Base64文本
+    :param key: 加密时使用的密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param workers: 并行解密的线程数
+    :return: 明文
+    """
+    try:
+        data = base64.b64decode(''.join(text.split()), validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("不是有效的Base64容器文本") from None
+    return unpack(data, key, engine, workers)
@@ -0,0 +1,244 @@
+# 增量加密
+# 逐位置算法（registry.FLAG_POSITION_LOCAL）的每个密文字符只取决于同位置的明文字符和 位置 mod 变换数，
+# 编辑明文时只需重新加密被修改的区间，不必每次重新加密全文
+#
+# 明文按约 BLOCK_SIZE 个字符分块保存，每块按相位（块起点 mod 变换数）缓存各自的密文。
+# 在位置p删除m个字符并插入k个字符时，只重写覆盖 [p, p + m) 的块；其后的块内容不变，
+# 起点整体移动 k - m 位后改用对应相位的缓存，缺少时在读取时才补算。
+# 块长度的前缀和用树状数组维护，定位编辑位置和求块起点都是 O(log 块数)，
+# 每次按键的耗时与文本总长无关；完整的明文和密文只在读取 plain/cipher 时才拼接。
+
+import re
+
+from . import key_transform, registry
+
+# 每块的目标字符数
+BLOCK_SIZE = 2048
+
+# 每块最多缓存的相位数，变换数更多时超出后清空重算
+MAX_PHASES = 16
+
+# 预览显示时需要替换的字符：控制字符、行/段分隔符、代理项和辅助平面字符
+# 替换为单个 U+FFFD，保证显示文本与密文逐字符对齐（都只含基本平面字符）
+_UNSAFE_RE = re.compile('[\x00-\x08\x0b-\x1f\x7f-\x9f\u2028\u2029\ud800-\udfff\U00010000-\U0010ffff]')
+_UNSAFE_LINE_RE = re.compile('[\x00-\x1f\x7f-\x9f\u2028\u2029\ud800-\udfff\U00010000-\U0010ffff]')
+
+def display_safe(text, plain=None):
+    """
+    将文本中不宜直接显示的字符替换为 U+FFFD，长度不变
+    :param text: 文本
+    :param plain: 对应的明文；提供时在明文换行的位置显示换行，其余位置不出现换行，
+                  使预览的段落与输入框一一对应
+    :return: 可安全放入文本控件的文本
+    """
+    if plain is None:
+        return _UNSAFE_RE.sub('\ufffd', text)
+    text = _UNSAFE_LINE_RE.sub('\ufffd', text)
+    if '\n' not in plain:
+        return text
+    pieces = []
+    offset = 0
+    for line in plain.split('\n'):
+        pieces.append(text[offset:offset + len(line)])
+        offset += len(line) + 1
+    return '\n'.join(pieces)
+
+class IncrementalCipher:
+    """
+    维护分块保存的明文及其密文缓存，编辑时只重新加密变化的块
+    :param codec_name: 算法标识，必须是逐位置算法
+    :param key: 可选密钥
+    :param full_unicode: 是否使用全码位模式
+    """
+
+    def __init__(self, codec_name='unicode', key=None, full_unicode=False):
+        info = registry.get_codec_info(codec_name)
+        if not info.has_flag(registry.FLAG_POSITION_LOCAL):
+            raise ValueError(f"算法 {codec_name} 不是逐位置算法，不能增量加密")
+        self.codec = info.codec
+        self.key = key or None
+        self.full_unicode = full_unicode
+        # 无密钥时密文与位置无关，只需一个相位
+        self.phases = key_transform.get_key_plan(self.key).size if self.key else 1
+        self.reset('')
+
+    def __len__(self):
+        """明文字符数"""
+        return self._length
+
+    @property
+    def plain(self):
+        """当前明文（首次读取时拼接）"""
+        if self._plain is None:
+            self._plain = ''.join(self._blocks)
+        return self._plain
+
+    @property
+    def cipher(self):
+        """当前密文（首次读取时拼接）"""
+        if self._cipher is None:
+            self._cipher = self.cipher_range(0, self._length)
+        return self._cipher
+
+    def _encrypt(self, text, start):
+        return self.codec.encrypt_at(text, self.key, start, full_unicode=self.full_unicode)
+
+    def reset(self, text):
+        """
+        以新的明文重建全部缓存
+        :param text: 明文
+        """
+        cipher = self._encrypt(text, 0)
+        n = self.phases
+        self._blocks = [text[i:i + BLOCK_SIZE] for i in range(0, len(text), BLOCK_SIZE)]
+        self._ciphers = [{i % n: cipher[i:i + BLOCK_SIZE]} for i in range(0, len(text), BLOCK_SIZE)]
+        self._rebuild()
+        self._plain = text
+        self._cipher = cipher
+
+    def _rebuild(self):
+        """丢弃空块并重建块长度的树状数组"""
+        if '' in self._blocks:
+            kept = [i for i, block in enumerate(self._blocks) if block]
+            self._blocks = [self._blocks[i] for i in kept]
+            self._ciphers = [self._ciphers[i] for i in kept]
+        count = len(self._blocks)
+        tree = [0] * (count + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent <= count:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top = 1 << count.bit_length() >> 1 if count else 0
+        self._length = sum(map(len, self._blocks))
+        self._empty = 0
+
+    def _add(self, index, delta):
+        """第index块的长度变化delta"""
+        tree = self._tree
+        index += 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def _locate(self, position):
+        """
+        查找包含 position 的块
+        :return: (块序号, 块起点)；position 不小于文本长度时块序号为块数
+        """
+        tree = self._tree
+        index = start = 0
+        step = self._top
+        while step:
+            nxt = index + step
+            if nxt < len(tree) and start + tree[nxt] <= position:
+                index = nxt
+                start += tree[nxt]
+            step >>= 1
+        return index, start
+
+    def _block_cipher(self, index, start):
+        """以块起点 start 对应的相位取第index块的密文，缓存中没有时补算"""
+        phase = start % self.phases
+        cache = self._ciphers[index]
+        cipher = cache.get(phase)
+        if cipher is None:
+            if len(cache) >= MAX_PHASES:
+                cache.clear()
+            cipher = cache[phase] = self._encrypt(self._blocks[index], phase)
+        return cipher
+
+    def _range(self, start, stop, piece):
+        start, stop, _ = slice(start, stop).indices(self._length)
+        if start >= stop:
+            return ''
+        index, block_start = self._locate(start)
+        pieces = []
+        position = block_start
+        while position < stop:
+            block = self._blocks[index]
+            if block:
+                pieces.append(piece(index, position))
+            position += len(block)
+            index += 1
+        return ''.join(pieces)[start - block_start:stop - block_start]
+
+    def cipher_range(self, start, stop):
+        """
+        读取密文区间，只拼接（必要时补算）覆盖该区间的块
+        :param start: 起始位置
+        :param stop: 结束位置（不含）
+        :return: 密文片段
+        """
+        if self._cipher is not None:
+            return self._cipher[start:stop]
+        return self._range(start, stop, self._block_cipher)
+
+    def plain_range(self, start, stop):
+        """
+        读取明文区间
+        :param start: 起始位置
+        :param stop: 结束位置（不含）
+        :return: 明文片段
+        """
+        if self._plain is not None:
+            return self._plain[start:stop]
+        return self._range(start, stop, lambda index, position: self._blocks[index])
+
+    def splice(self, position, removed, added):
+        """
+        在 position 处删除 removed 个字符并插入 added
+        :param position: 编辑位置
+        :param removed: 删除的字符数
+        :param added: 插入的文本
+        :return: (起点, 旧终点, 新终点)，表示密文中原来的 [起点, 旧终点) 变为现在的 [起点, 新终点)，
+                 可用 cipher_range 读取
+        """
+        old_length = self._length
+        if position < 0 or removed < 0 or position + removed > old_length:
+            raise ValueError("编辑区间超出文本范围")
+        if not old_length:
+            self.reset(added)
+            return 0, 0, len(added)
+        end = position + removed
+        shift = len(added) - removed
+
+        # 覆盖编辑区间的块：末尾插入时并入最后一块
+        first, first_start = self._locate(min(position, old_length - 1))
+        last, last_start = self._locate(end - 1) if removed else (first, first_start)
+        text = self._blocks[first][:position - first_start] + added + self._blocks[last][end - last_start:]
+        # 过短的块与后面的块合并，避免编辑后留下大量碎块
+        while len(text) < BLOCK_SIZE // 2 and last + 1 < len(self._blocks):
+            last += 1
+            text += self._blocks[last]
+        # 先加密再修改状态，加密出错时缓存保持不变
+        cipher = self._encrypt(text, first_start)
+
+        for index in range(first + 1, last + 1):
+            if self._blocks[index]:
+                self._add(index, -len(self._blocks[index]))
+                self._blocks[index] = ''
+                self._ciphers[index] = {}
+                self._empty += 1
+        self._add(first, len(text) - len(self._blocks[first]))
+        self._blocks[first] = text
+        self._ciphers[first] = {first_start % self.phases: cipher}
+        self._length += shift
+        self._plain = self._cipher = None
+
+        if len(text) > 2 * BLOCK_SIZE:
+            # 大段插入：按块大小拆开，各块密文直接从刚算出的结果中切取
+            self._blocks[first:first + 1] = [text[i:i + BLOCK_SIZE] for i in range(0, len(text), BLOCK_SIZE)]
+            self._ciphers[first:first + 1] = [{(first_start + i) % self.phases: cipher[i:i + BLOCK_SIZE]}
+                                              for i in range(0, len(text), BLOCK_SIZE)]
+            self._rebuild()
+        elif not text:
+            self._empty += 1
+        if self._empty > max(16, len(self._blocks) // 2):
+            self._rebuild()
+
+        if shift % self.phases == 0:
+            # 其后各块的相位不变，只有编辑区间本身变化
+            return position, end, position + len(added)
+        return position, old_length, self._length
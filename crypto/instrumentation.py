@@ -0,0 +1,182 @@
+# 性能统计
+# 为密钥变换和各编解码算法的关键阶段记录调用次数、耗时和处理量，默认关闭
+# 关闭时热路径上只多一次模块属性判断；设置环境变量 CRYPTO_INSTRUMENT=1 或调用 enable() 开启
+# （环境变量为空、0、false、no、off 时视为关闭）
+#
+#   from crypto import instrumentation
+#   instrumentation.enable()
+#   ...
+#   print(instrumentation.format_stats())
+#
+#   with instrumentation.profile() as report:      # cProfile
+#       ...
+#   with instrumentation.trace_memory() as memory:  # tracemalloc
+#       ...
+
+import contextlib
+import io
+import os
+import threading
+import time
+
+def _env_flag(name):
+    """读取布尔型环境变量"""
+    return os.environ.get(name, '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+# 各模块在热路径上直接读取该属性：if instrumentation.enabled: ...
+enabled = _env_flag('CRYPTO_INSTRUMENT')
+
+clock = time.perf_counter
+
+_lock = threading.Lock()
+_stats = {}  # 阶段名 -> [调用次数, 累计秒数, 处理量]
+
+def enable():
+    """开启统计"""
+    global enabled
+    enabled = True
+
+def disable():
+    """关闭统计（已记录的数据保留）"""
+    global enabled
+    enabled = False
+
+def is_enabled():
+    return enabled
+
+def record(stage, started, amount=0):
+    """
+    记录一次阶段耗时
+    :param stage: 阶段名，如 'transform.numpy'
+    :param started: clock() 返回的开始时间
+    :param amount: 本次处理的字符数或字节数
+    """
+    elapsed = clock() - started
+    with _lock:
+        entry = _stats.get(stage)
+        if entry is None:
+            _stats[stage] = [1, elapsed, amount]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += amount
+
+@contextlib.contextmanager
+def stage(name, amount=0):
+    """
+    统计一段代码的耗时（非热路径使用；关闭时不计时）
+    :param name: 阶段名
+    :param amount: 处理量
+    """
+    if not enabled:
+        yield
+        return
+    started = clock()
+    try:
+        yield
+    finally:
+        record(name, started, amount)
+
+def reset_stats():
+    """清空已记录的统计"""
+    with _lock:
+        _stats.clear()
+
+def get_stats():
+    """
+    当前统计
+    :return: {'stages': {阶段名: {'calls', 'seconds', 'amount', 'per_second'}},
+              'plan_cache': {'hits', 'misses', 'size', 'hit_rate'}, 'enabled': bool}
+    """
+    from . import key_transform
+    with _lock:
+        snapshot = {name: tuple(entry) for name, entry in _stats.items()}
+    stages = {}
+    for name, (calls, seconds, amount) in sorted(snapshot.items()):
+        stages[name] = {
+            'calls': calls,
+            'seconds': seconds,
+            'amount': amount,
+            'per_second': amount / seconds if seconds and amount else None,
+        }
+    cache = key_transform.plan_cache_info()
+    lookups = cache.hits + cache.misses
+    return {
+        'enabled': enabled,
+        'stages': stages,
+        'plan_cache': {
+            'hits': cache.hits,
+            'misses': cache.misses,
+            'size': cache.currsize,
+            'hit_rate': cache.hits / lookups if lookups else None,
+        },
+    }
+
+def format_stats(stats=None):
+    """
+    将统计格式化为文本表格
+    :param stats: get_stats() 的结果，None时重新获取
+    :return: 文本
+    """
+    stats = stats or get_stats()
+    lines = [f"{'阶段':<24}{'次数':>10}{'总耗时(ms)':>14}{'平均(us)':>12}{'处理量':>14}{'吞吐(/s)':>14}"]
+    for name, s in stats['stages'].items():
+        average = s['seconds'] / s['calls'] * 1e6
+        rate = f"{s['per_second']:.3g}" if s['per_second'] else '-'
+        lines.append(f"{name:<24}{s['calls']:>10}{s['seconds'] * 1000:>14.2f}{average:>12.1f}"
+                     f"{s['amount']:>14}{rate:>14}")
+    cache = stats['plan_cache']
+    rate = f"{cache['hit_rate']:.1%}" if cache['hit_rate'] is not None else '-'
+    lines.append('')
+    lines.append(f"密钥计划缓存：命中 {cache['hits']}，未命中 {cache['misses']}，"
+                 f"缓存 {cache['size']} 个，命中率 {rate}")
+    if not stats['enabled']:
+        lines.append('（统计未开启）')
+    return '\n'.join(lines)
+
+@contextlib.contextmanager
+def profile(sort='cumulative', limit=30):
+    """
+    用 cProfile 分析一段代码
+    :param sort: pstats 排序字段
+    :param limit: 报告中保留的函数数
+    :return: 上下文变量为字典，退出后 'text' 为报告文本，'profile' 为 cProfile.Profile
+    """
+    import cProfile
+    import pstats
+    report = {}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+        report['profile'] = profiler
+        report['text'] = stream.getvalue()
+
+@contextlib.contextmanager
+def trace_memory(frames=1, limit=10):
+    """
+    用 tracemalloc 统计一段代码的内存分配
+    :param frames: 每次分配记录的调用栈深度
+    :param limit: 报告中保留的分配位置数
+    :return: 上下文变量为字典，退出后包含 'current'、'peak'（字节）和 'top'（分配最多的位置）
+    """
+    import tracemalloc
+    report = {}
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start(frames)
+    tracemalloc.reset_peak()
+    try:
+        yield report
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if not started:
+            tracemalloc.stop()
+        report['current'] = current
+        report['peak'] = peak
+        report['top'] = [str(s) for s in snapshot.statistics('lineno')[:limit]]
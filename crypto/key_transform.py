@@ -1,11 +1,56 @@
 # 密钥生成和变换模块
 # 支持随机生成密钥和基于密钥的字符变换
 
-import random
-import string
-import time
 import hashlib
 import math
+import functools
+import re
+import sys
+from array import array
+from . import instrumentation, keygen, schedules, vectorized
+
+# 文本长度达到该阈值且numpy可用时，自动切换到向量化引擎
+VECTORIZE_THRESHOLD = 2048
+
+# 无numpy时，文本长度达到该阈值才值得构建65536项查找表（按4个槽位计，槽位越多阈值按比例越高）
+TABLE_THRESHOLD = 262144
+
+# 槽位数超过该值时不自动使用查表引擎：每个槽位每个方向一张128KB的表，且随变换计划长期缓存
+TABLE_MAX_SLOTS = 16
+
+# 变换计划LRU缓存可容纳的密钥数量
+PLAN_CACHE_SIZE = 128
+
+# 已校验密钥缓存可容纳的密钥数量
+VALIDATION_CACHE_SIZE = 4096
+
+# 可选的变换引擎，None表示自动选择
+ENGINES = ('python', 'numpy', 'table')
+
+# 全码位模式：在全部Unicode标量值（U+0000..U+10FFFF，不含代理项区）上做双射，
+# 码点先映射为连续下标 0..FULL_RANGE-1，结果既不会丢失信息也不会落入代理项区
+SURROGATE_START = 0xD800
+SURROGATE_END = 0xE000
+SURROGATE_SIZE = SURROGATE_END - SURROGATE_START
+FULL_RANGE = 0x110000 - SURROGATE_SIZE  # 1112064 = 2^11 * 543
+# FULL_RANGE 是 2^11 的倍数，只在低11位上做循环位移和XOR不会越界
+FULL_LOW_BITS = 11
+FULL_LOW_MASK = (1 << FULL_LOW_BITS) - 1
+
+_SURROGATE_RE = re.compile('[\ud800-\udfff]')
+
+# array('I') 按本机字节序存储码点
+_UTF32_NATIVE = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+# 常见的纯ASCII密钥一次匹配完成全部校验：8-32位字母数字，且至少含一个字母和一个数字
+_ASCII_KEY_RE = re.compile(r'(?=[A-Za-z]*[0-9])(?=[0-9]*[A-Za-z])[A-Za-z0-9]{8,32}')
+
+class ValidatedKey(str):
+    """
+    已通过校验的密钥（由 check_key 返回）
+    get_key_plan 及各算法收到该类型时不再重复校验，其余用法与普通字符串相同
+    """
+    __slots__ = ()
 
 def gcd(a, b):
     """
@@ -35,26 +80,34 @@ def mod_inverse(a, m):
         raise ValueError(f"模逆不存在: gcd({a}, {m}) = {gcd_val}")
     return (x % m + m) % m
 
+def scalar_to_index(code):
+    """
+    Unicode标量值 -> 连续下标（跳过代理项区）
+    """
+    return code - SURROGATE_SIZE if code >= SURROGATE_END else code
+
+def index_to_scalar(index):
+    """
+    连续下标 -> Unicode标量值
+    """
+    return index + SURROGATE_SIZE if index >= SURROGATE_START else index
+
+def check_scalars(text):
+    """
+    检查文本中是否有孤立的代理项字符（全码位模式无法处理，也无法编码为UTF-8）
+    """
+    match = _SURROGATE_RE.search(text)
+    if match:
+        raise ValueError(f"第{match.start() + 1}个字符是孤立的代理项 U+{ord(match.group()):04X}，无法进行全码位变换")
+
 def generate_random_key(length=16):
     """
     生成随机密钥，包含数字和字母的组合
-    :param length: 密钥长度，默认16位
+    :param length: 密钥长度，默认16位（8-32）
     :return: 随机密钥字符串
     """
-    # 使用时间种子确保每次生成的密钥都不同
-    random.seed(int(time.time() * 1000000) % 2147483647)
-    
-    # 确保密钥包含数字和字母
-    chars = string.ascii_letters + string.digits  # a-z, A-Z, 0-9
-    key = ''.join(random.choice(chars) for _ in range(length))
-    
-    # 确保至少包含一个数字和一个字母
-    if not any(c.isdigit() for c in key):
-        key = key[:-1] + random.choice(string.digits)
-    if not any(c.isalpha() for c in key):
-        key = key[:-1] + random.choice(string.ascii_letters)
-    
-    return key
+    # 使用 secrets 随机源，批量生成见 keygen.generate_keys
+    return keygen.generate_keys(1, length)[0]
 
 def validate_key(key):
     """
@@ -65,6 +118,10 @@ def validate_key(key):
     if not key:
         return False, "密钥不能为空"
     
+    # 纯ASCII密钥单次匹配；不匹配时逐项检查以给出具体原因
+    if _ASCII_KEY_RE.fullmatch(key):
+        return True, ""
+    
     if len(key) < 8:
         return False, "密钥长度至少8位"
     
@@ -87,6 +144,24 @@ def validate_key(key):
     
     return True, ""
 
+def check_key(key):
+    """
+    校验密钥，同一进程内校验过的密钥直接从缓存返回
+    :param key: 密钥字符串
+    :return: ValidatedKey
+    :raises ValueError: 密钥无效
+    """
+    if type(key) is ValidatedKey:
+        return key
+    return _check_key(key)
+
+@functools.lru_cache(maxsize=VALIDATION_CACHE_SIZE)
+def _check_key(key):
+    is_valid, error_msg = validate_key(key)
+    if not is_valid:
+        raise ValueError(f"密钥无效: {error_msg}")
+    return ValidatedKey(key)
+
 def key_to_transform_sequence(key):
     """
     将密钥转换为复杂变换序列
@@ -124,76 +199,526 @@ def key_to_transform_sequence(key):
     
     return transforms
 
-def apply_key_transform(text, key, encrypt=True):
+class KeyPlan:
+    """
+    编译后的密钥变换计划
+    保存校验过的变换参数，以及预先算好的模逆元、位移量和16位XOR掩码，
+    同一密钥的重复加解密无需再做任何准备工作
+    offset 非0时为合并了码位位移的计划（见 shifted）：
+    加密 x 等于原计划加密 x + offset，解密结果等于原计划解密结果 - offset（都按模运算）
+    schedule 为生成变换参数的密钥编排（见 schedules 模块）
+    """
+    
+    def __init__(self, key, transforms, offset=0, schedule=schedules.DEFAULT_SCHEDULE):
+        self.key = key
+        self.transforms = transforms
+        self.offset = offset
+        self.schedule = schedule
+        self.size = len(transforms)
+        self.mults = tuple(t['mult'] for t in transforms)
+        # (x + offset) * a + b = x * a + (b + offset * a)，位移直接并入加法常数
+        self.adds = tuple((t['add'] + offset * t['mult']) % 65536 for t in transforms)
+        self.shifts = tuple(t['shift'] % 16 for t in transforms)
+        self.xor_masks = tuple(t['xor'] | (t['xor'] << 8) for t in transforms)
+        self.mult_inverses = tuple(mod_inverse(m, 65536) for m in self.mults)
+        # 逐字符循环中按槽位直接解包的参数元组
+        self.slots = tuple(zip(self.mults, self.adds, self.shifts,
+                               self.xor_masks, self.mult_inverses))
+        # 全码位模式参数：乘法因子调整为与 FULL_RANGE 互质，位移和XOR只作用于低11位
+        full_slots = []
+        for t in transforms:
+            mult = t['mult']
+            while gcd(mult, FULL_RANGE) != 1:
+                mult += 2
+            full_slots.append((
+                mult,
+                (t['add'] * 17 + t['xor'] + offset * mult) % FULL_RANGE,
+                t['shift'] % FULL_LOW_BITS,
+                ((t['xor'] << 3) | (t['shift'] & 7)) & FULL_LOW_MASK,
+                mod_inverse(mult, FULL_RANGE),
+            ))
+        self.full_slots = tuple(full_slots)
+        # 查找表按需构建：{(是否加密, 是否做0→1映射): 查找表列表}
+        self._tables = {}
+        self._shifted = {}
+    
+    def shifted(self, offset):
+        """
+        获取合并了码位位移的计划（随本计划一起缓存）
+        :param offset: 码位位移量
+        :return: KeyPlan
+        """
+        if not offset:
+            return self
+        plan = self._shifted.get(offset)
+        if plan is None:
+            plan = self._shifted[offset] = KeyPlan(self.key, self.transforms, self.offset + offset,
+                                                           self.schedule)
+        return plan
+    
+    def has_tables(self, encrypt=True, fix_zero=True):
+        """
+        查找表是否已构建
+        """
+        return (encrypt, fix_zero) in self._tables
+    
+    def tables(self, encrypt=True, fix_zero=True):
+        """
+        获取每个槽位的65536项查找表（首次调用时构建，随计划一起缓存）
+        :param encrypt: True返回加密表，False返回解密表
+        :param fix_zero: 是否包含文本模式的 0→1 映射（字节编码使用无损的False）
+        :return: array('H') 列表，长度为 self.size
+        """
+        tables = self._tables.get((encrypt, fix_zero))
+        if tables is None:
+            with instrumentation.stage('key.tables'):
+                tables = self._tables[(encrypt, fix_zero)] = _build_tables(self, encrypt, fix_zero)
+        return tables
+    
+    def __repr__(self):
+        offset = f", offset={self.offset}" if self.offset else ''
+        schedule = f", schedule={self.schedule!r}" if self.schedule != schedules.DEFAULT_SCHEDULE else ''
+        return f"KeyPlan(key={self.key[:4]!r}****, size={self.size}{offset}{schedule})"
+
+def get_key_plan(key, schedule=None):
+    """
+    获取密钥对应的变换计划（带LRU缓存）
+    ValidatedKey 与同值的普通字符串、同一编排的不同写法（'blake2b'/'blake2b:16'、'md5'/None）
+    在这里规范化后再查缓存，共用同一个缓存项和计划对象
+    :param key: 密钥，普通字符串或 ValidatedKey（后者不再重复校验）
+    :param schedule: 密钥编排名称（如 'blake2b:64'），None为默认的md5编排
+    :return: KeyPlan
+    """
+    if type(key) is ValidatedKey:
+        key = str.__str__(key)
+    else:
+        started = instrumentation.clock() if instrumentation.enabled else None
+        try:
+            check_key(key)
+        finally:
+            if started is not None:
+                instrumentation.record('key.validate', started)
+    if schedule is not None:
+        schedule = schedules.resolve(schedule)[0]
+        if schedule == schedules.DEFAULT_SCHEDULE:
+            schedule = None
+    return _get_key_plan(key, schedule)
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _get_key_plan(key, schedule):
+    """构建变换计划；key 已校验、schedule 已规范化（默认编排为None）"""
+    name, info, slots = schedules.resolve(schedule)
+    key = ValidatedKey(key)
+    started = instrumentation.clock() if instrumentation.enabled else None
+    plan = KeyPlan(key, info.transforms(key, slots), schedule=name)
+    if started is not None:
+        instrumentation.record('key.schedule', started)
+    return plan
+
+def plan_cache_info():
+    """
+    查看变换计划缓存的命中情况
+    :return: (hits, misses, maxsize, currsize)
+    """
+    return _get_key_plan.cache_info()
+
+def clear_plan_cache():
+    """
+    清空变换计划缓存
+    """
+    _get_key_plan.cache_clear()
+
+def _build_tables(plan, encrypt, fix_zero=True):
+    """
+    为变换计划的每个槽位构建完整的16位查找表
+    解密表直接由逆向运算生成（而不是求加密表的反函数），
+    因此与算术实现对 0→1 等边界情况的处理完全一致
+    """
+    size = plan.size
+    tables = []
+    if vectorized.is_available():
+        # 逐槽位变换全部码点，槽位多时也不需要 65536 * size 长的中间数据
+        np = vectorized.np
+        codes = np.arange(65536, dtype=np.uint32)
+        for k in range(size):
+            mapped = vectorized.transform_codes(codes, plan, encrypt, np.full(65536, k), fix_zero)
+            table = array('H')
+            table.frombytes(mapped.astype('<u2').tobytes())
+            tables.append(table)
+        return tables
+    # 每个码点重复size次，第k个副本恰好落在槽位k上
+    text = ''.join(chr(code) * size for code in range(65536))
+    mapped = _apply_transform_python(text, plan, encrypt, fix_zero=fix_zero)
+    for k in range(size):
+        table = array('H')
+        table.frombytes(mapped[k::size].encode('utf-16-le', 'surrogatepass'))
+        tables.append(table)
+    return tables
+
+def _rotate(values, start):
+    """
+    按起始位置轮转槽位序列，使局部下标i对应全局槽位 (start + i) % len(values)
+    """
+    offset = start % len(values)
+    if offset:
+        values = values[offset:] + values[:offset]
+    return values
+
+def _select_engine(text, plan, encrypt, fix_zero=True):
+    """
+    根据文本长度和运行环境自动选择变换引擎
+    """
+    if len(text) >= VECTORIZE_THRESHOLD and vectorized.is_available():
+        return 'numpy'
+    if plan.has_tables(encrypt, fix_zero):
+        return 'table'
+    # 构建查找表的开销与槽位数成正比
+    if plan.size <= TABLE_MAX_SLOTS and len(text) >= TABLE_THRESHOLD * plan.size // 4:
+        return 'table'
+    return 'python'
+
+def apply_key_transform(text, key, encrypt=True, engine=None, start=0, full_unicode=False, offset=0,
+                        schedule=None):
     """
     使用密钥对文本进行复杂数学变换
     :param text: 要变换的文本
     :param key: 密钥
     :param encrypt: True为加密，False为解密
+    :param engine: 变换引擎（'python'/'numpy'/'table'），None为自动选择
+    :param start: 文本首字符在整段数据中的位置，分块处理时保证变换序列连续
+    :param full_unicode: True时使用全码位模式，所有字符（含emoji）都能精确还原
+    :param offset: 合并进变换的码位位移（0..65535）：加密时相当于先把每个字符的码位加 offset 再变换，
+                   解密时相当于变换后再减 offset，一次遍历完成，结果与分两步处理完全一致
+    :param schedule: 密钥编排名称，None为默认的md5编排
     :return: 变换后的文本
     """
     if not text:
         return text
     
-    # 验证密钥
-    is_valid, error_msg = validate_key(key)
-    if not is_valid:
-        raise ValueError(f"密钥无效: {error_msg}")
+    # 验证密钥并获取变换计划（同一密钥只会计算一次）
+    # 默认编排不传 schedule 参数，与其他只传密钥的调用共用缓存中的同一个计划
+    plan = get_key_plan(key, schedule)
+    started = instrumentation.clock() if instrumentation.enabled else None
+    
+    if full_unicode:
+        result = _apply_full_transform(text, plan.shifted(offset), encrypt, engine, start)
+        engine = 'full'
+    else:
+        fix_zero = _check_offset(text, offset, encrypt)
+        plan = plan.shifted(offset)
+        if engine is None:
+            engine = _select_engine(text, plan, encrypt, fix_zero)
+        elif engine not in ENGINES:
+            raise ValueError(f"未知的变换引擎: {engine}")
+        
+        if engine == 'numpy':
+            if not vectorized.is_available():
+                raise RuntimeError("numpy引擎需要安装numpy")
+            result = vectorized.apply_transform(text, plan, encrypt, start, fix_zero)
+        elif engine == 'table':
+            result = _apply_transform_table(text, plan, encrypt, start, fix_zero)
+        else:
+            result = _apply_transform_python(text, plan, encrypt, start, fix_zero)
+        if not fix_zero:
+            _check_offset_result(result, offset)
     
-    # 获取变换序列
-    transforms = key_to_transform_sequence(key)
+    if started is not None:
+        instrumentation.record(f'transform.{engine}', started, len(text))
+    return result
+
+def _check_offset(text, offset, encrypt):
+    """
+    检查合并位移的默认模式变换能否进行，返回是否需要 0→1 映射
+    分两步时，加密先做 chr(码位 + offset)，超出 U+10FFFF 的字符会报错；
+    解密的 0→1 映射发生在减去位移之前，其结果减 offset 后必然为负数而报错，
+    因此合并后解密不做映射，改为检查结果（见 _check_offset_result）
+    """
+    if not offset:
+        return True
+    if not 0 < offset < 65536:
+        raise ValueError(f"码位位移超出范围: {offset}")
+    if encrypt:
+        if max(text) > chr(0x10FFFF - offset):
+            position = next(i for i, c in enumerate(text) if ord(c) > 0x10FFFF - offset)
+            raise ValueError(f"第{position + 1}个字符 U+{ord(text[position]):04X} 位移后超出Unicode范围")
+        return True
+    return False
+
+def _check_offset_result(result, offset):
+    """
+    合并位移解密的结果检查：未合并时变换结果 u 总在 0..65535，减去 offset 后为负数即报错，
+    合并后对应的结果为 (u - offset) mod 65536 >= 65536 - offset
+    """
+    if max(result) >= chr(65536 - offset):
+        position = next(i for i, c in enumerate(result) if ord(c) >= 65536 - offset)
+        raise ValueError(f"第{position + 1}个字符解密后码位为负数，密钥错误或密文已损坏")
+
+def _apply_full_transform(text, plan, encrypt, engine, start):
+    """
+    全码位模式：在 0..FULL_RANGE-1 的标量下标上依次做仿射变换、低11位循环位移和XOR
+    查找表只覆盖16位码点，该模式下 'table' 引擎按算术实现处理
+    """
+    check_scalars(text)
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f"未知的变换引擎: {engine}")
+    if engine == 'numpy' and not vectorized.is_available():
+        raise RuntimeError("numpy引擎需要安装numpy")
+    if engine == 'numpy' or (engine is None and len(text) >= VECTORIZE_THRESHOLD and vectorized.is_available()):
+        return vectorized.apply_full_transform(text, plan, encrypt, start)
     
+    slots = _rotate(plan.full_slots, start)
+    size = plan.size
     result = []
     for i, char in enumerate(text):
-        # 使用循环的变换序列
-        transform_index = i % len(transforms)
-        params = transforms[transform_index]
+        mult, add, rot, mask, mult_inv = slots[i % size]
+        index = scalar_to_index(ord(char))
         
-        char_code = ord(char)
+        if encrypt:
+            # 步骤1: 仿射变换 (ax + b) mod FULL_RANGE
+            index = (index * mult + add) % FULL_RANGE
+            # 步骤2、3: 低11位循环左移后异或，高位不变
+            low = index & FULL_LOW_MASK
+            low = ((low << rot) | (low >> (FULL_LOW_BITS - rot))) & FULL_LOW_MASK
+            index = (index & ~FULL_LOW_MASK) | (low ^ mask)
+        else:
+            # 严格逆向：XOR、低11位循环右移、仿射逆变换
+            low = (index & FULL_LOW_MASK) ^ mask
+            low = ((low >> rot) | (low << (FULL_LOW_BITS - rot))) & FULL_LOW_MASK
+            index = (index & ~FULL_LOW_MASK) | low
+            index = (mult_inv * (index - add)) % FULL_RANGE
+        
+        result.append(chr(index_to_scalar(index)))
+    
+    return ''.join(result)
+
+def shift_scalars(text, offset):
+    """
+    在全码位下标空间内整体位移（mod FULL_RANGE），结果不会落入代理项区
+    :param text: 文本
+    :param offset: 位移量，可为负数
+    :return: 位移后的文本
+    """
+    check_scalars(text)
+    if len(text) >= VECTORIZE_THRESHOLD and vectorized.is_available():
+        return vectorized.shift_scalars(text, offset)
+    return ''.join(chr(index_to_scalar((scalar_to_index(ord(c)) + offset) % FULL_RANGE)) for c in text)
+
+def _apply_transform_table(text, plan, encrypt=True, start=0, fix_zero=True):
+    """
+    查表实现：每个槽位的字符子序列用 str.translate 一次完成映射
+    :param text: 要变换的文本
+    :param plan: KeyPlan
+    :param encrypt: True为加密，False为解密
+    :param start: 文本首字符的全局位置
+    :param fix_zero: 是否将结果0映射为1
+    :return: 变换后的文本
+    """
+    # 查找表只覆盖16位码点，含辅助平面字符时回退到算术实现
+    if max(text) > '\uffff':
+        return _apply_transform_python(text, plan, encrypt, start, fix_zero)
+    
+    tables = _rotate(plan.tables(encrypt, fix_zero), start)
+    size = plan.size
+    if len(text) <= size:
+        return ''.join(chr(tables[i][ord(c)]) for i, c in enumerate(text))
+    
+    # 按槽位拆分子序列查表，再交错写回同一个码点数组
+    result = array('I', bytes(4 * len(text)))
+    for k in range(size):
+        part = array('I')
+        part.frombytes(text[k::size].translate(tables[k]).encode('utf-32-le', 'surrogatepass'))
+        result[k::size] = part
+    return result.tobytes().decode('utf-32-le', 'surrogatepass')
+
+def _apply_transform_python(text, plan, encrypt=True, start=0, fix_zero=True):
+    """
+    逐字符变换的纯Python实现
+    :param text: 要变换的文本
+    :param plan: KeyPlan
+    :param encrypt: True为加密，False为解密
+    :param start: 文本首字符的全局位置
+    :param fix_zero: 是否将结果0映射为1（文本模式避免产生NUL字符，字节编码不需要）
+    :return: 变换后的文本
+    """
+    codes = array('I', _transform_codes_python(map(ord, text), plan, encrypt, start, fix_zero))
+    return codes.tobytes().decode(_UTF32_NATIVE, 'surrogatepass')
+
+def _transform_codes_python(codes, plan, encrypt=True, start=0, fix_zero=True):
+    """
+    逐码点变换的纯Python实现（文本和16位码元共用）
+    :param codes: 码点整数的可迭代对象
+    :return: 变换后的码点列表
+    """
+    slots = _rotate(plan.slots, start)
+    size = plan.size
+    result = []
+    for i, char_code in enumerate(codes):
+        # 使用循环的变换序列
+        mult, add, shift_amount, xor_mask, mult_inv = slots[i % size]
         
         if encrypt:
             # 复杂加密变换：多步骤可逆变换
             # 步骤1: 仿射变换 (ax + b) mod 65536
-            step1 = (char_code * params['mult'] + params['add']) % 65536
+            step1 = (char_code * mult + add) % 65536
             # 步骤2: 位运算 - 循环左移
-            shift_amount = params['shift'] % 16
             step2 = ((step1 << shift_amount) | (step1 >> (16 - shift_amount))) & 0xFFFF
             # 步骤3: XOR变换
-            new_code = step2 ^ (params['xor'] | (params['xor'] << 8))
+            new_code = step2 ^ xor_mask
         else:
             # 复杂解密变换：严格逆向操作
             # 步骤3逆: XOR逆变换
-            step3_inv = char_code ^ (params['xor'] | (params['xor'] << 8))
+            step3_inv = char_code ^ xor_mask
             # 步骤2逆: 循环右移
-            shift_amount = params['shift'] % 16
             step2_inv = ((step3_inv >> shift_amount) | (step3_inv << (16 - shift_amount))) & 0xFFFF
-            # 步骤1逆: 仿射逆变换
-            mult_inv = mod_inverse(params['mult'], 65536)
-            new_code = (mult_inv * (step2_inv - params['add'])) % 65536
+            # 步骤1逆: 仿射逆变换（模逆元已预先计算）
+            new_code = (mult_inv * (step2_inv - add)) % 65536
         
         # 确保结果在合理的Unicode范围内
-        new_code = new_code % 65536
-        if new_code == 0:
+        if new_code == 0 and fix_zero:
             new_code = 1
         
-        result.append(chr(new_code))
+        result.append(new_code)
     
-    return ''.join(result)
+    return result
+
+def transform_units(units, key, encrypt=True, engine=None, start=0, schedule=None):
+    """
+    对16位码元序列做无损变换，结果直接打包为小端uint16字节串
+    与文本模式不同，这里不做 0→1 映射，变换是严格的双射
+    :param units: bytes/bytearray/memoryview（每个字节是一个码元）或 array('H')
+    :param key: 密钥
+    :param encrypt: True为加密，False为解密
+    :param engine: 变换引擎，None为自动选择
+    :param start: 首个码元的全局位置
+    :param schedule: 密钥编排名称，None为默认的md5编排
+    :return: 小端uint16字节串
+    """
+    started = instrumentation.clock() if instrumentation.enabled else None
+    result = _transform_units(units, key, encrypt, engine, start, schedule)
+    if started is not None:
+        instrumentation.record('transform.units', started, len(units))
+    return result
+
+def _transform_units(units, key, encrypt, engine, start, schedule):
+    plan = get_key_plan(key, schedule)
+    if not len(units):
+        return b''
+    
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f"未知的变换引擎: {engine}")
+    if engine == 'numpy' or (engine is None and len(units) >= VECTORIZE_THRESHOLD and vectorized.is_available()):
+        if not vectorized.is_available():
+            raise RuntimeError("numpy引擎需要安装numpy")
+        return vectorized.transform_units(units, plan, encrypt, start)
+    
+    # 直接在码元数组上变换，不构造中间字符串
+    if engine is None:
+        engine = _select_engine(units, plan, encrypt, fix_zero=False)
+    if engine == 'table':
+        # 按槽位拆分子序列，用该槽位的查找表逐个映射后交错写回
+        tables = _rotate(plan.tables(encrypt, fix_zero=False), start)
+        size = plan.size
+        result = array('H', bytes(2 * len(units)))
+        for k in range(size):
+            result[k::size] = array('H', map(tables[k].__getitem__, units[k::size]))
+    else:
+        result = array('H', _transform_codes_python(units, plan, encrypt, start, fix_zero=False))
+    if sys.byteorder != 'little':
+        result.byteswap()
+    return result.tobytes()
+
+def transform_joined(text, lengths, key, encrypt=True, engine=None, full_unicode=False, offset=0,
+                     schedule=None):
+    """
+    对多条记录拼接成的文本做密钥变换，每条记录的变换序列都从位置0开始
+    结果与逐条调用 apply_key_transform 后拼接完全一致，但密钥只解析一次，
+    总长度足够时只做一次向量化运算
+    :param text: 各记录按顺序拼接的文本
+    :param lengths: 各记录长度，之和必须等于 len(text)
+    :param key: 密钥
+    :param encrypt: True为加密，False为解密
+    :param engine: 变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param offset: 合并进变换的码位位移，含义同 apply_key_transform
+    :param schedule: 密钥编排名称，None为默认的md5编排
+    :return: 变换后的拼接文本
+    """
+    started = instrumentation.clock() if instrumentation.enabled else None
+    result = _transform_joined(text, lengths, key, encrypt, engine, full_unicode, offset, schedule)
+    if started is not None:
+        instrumentation.record('transform.joined', started, len(text))
+    return result
+
+def _transform_joined(text, lengths, key, encrypt, engine, full_unicode, offset, schedule):
+    if sum(lengths) != len(text):
+        raise ValueError("记录长度之和与文本长度不一致")
+    if not text:
+        return text
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f"未知的变换引擎: {engine}")
+    if engine == 'numpy' and not vectorized.is_available():
+        raise RuntimeError("numpy引擎需要安装numpy")
+    
+    plan = get_key_plan(key, schedule).shifted(offset)
+    if full_unicode:
+        check_scalars(text)
+        fix_zero = True
+    else:
+        fix_zero = _check_offset(text, offset, encrypt)
+    
+    if engine == 'numpy' or (engine is None and len(text) >= VECTORIZE_THRESHOLD and vectorized.is_available()):
+        slots = vectorized.record_slots(lengths, plan.size)
+        codes = vectorized.text_to_codes(text)
+        if full_unicode:
+            codes = vectorized.transform_full_codes(codes, plan, encrypt, slots)
+        else:
+            codes = vectorized.transform_codes(codes, plan, encrypt, slots, fix_zero)
+        result = vectorized.codes_to_text(codes)
+    else:
+        # 逐条处理，密钥计划只取一次
+        pieces = []
+        position = 0
+        for length in lengths:
+            record = text[position:position + length]
+            position += length
+            if not record:
+                continue
+            if full_unicode:
+                pieces.append(_apply_full_transform(record, plan, encrypt, 'python', 0))
+            elif engine == 'table':
+                pieces.append(_apply_transform_table(record, plan, encrypt, fix_zero=fix_zero))
+            else:
+                pieces.append(_apply_transform_python(record, plan, encrypt, fix_zero=fix_zero))
+        result = ''.join(pieces)
+    
+    if not fix_zero:
+        _check_offset_result(result, offset)
+    return result
 
-def encrypt_with_key(text, key):
+def encrypt_with_key(text, key, engine=None, start=0, full_unicode=False, schedule=None):
     """
     使用密钥加密文本
     :param text: 明文
     :param key: 密钥
+    :param engine: 变换引擎，None为自动选择
+    :param start: 文本首字符的全局位置（分块加密时使用）
+    :param full_unicode: 是否使用全码位模式
+    :param schedule: 密钥编排名称，None为默认的md5编排
     :return: 密文
     """
-    return apply_key_transform(text, key, encrypt=True)
+    return apply_key_transform(text, key, encrypt=True, engine=engine, start=start,
+                               full_unicode=full_unicode, schedule=schedule)
 
-def decrypt_with_key(text, key):
+def decrypt_with_key(text, key, engine=None, start=0, full_unicode=False, schedule=None):
     """
     使用密钥解密文本
     :param text: 密文
     :param key: 密钥
+    :param engine: 变换引擎，None为自动选择
+    :param start: 文本首字符的全局位置（分块解密时使用）
+    :param full_unicode: 是否使用全码位模式
+    :param schedule: 密钥编排名称，None为默认的md5编排
     :return: 明文
     """
-    return apply_key_transform(text, key, encrypt=False)
\ No newline at end of file
+    return apply_key_transform(text, key, encrypt=False, engine=engine, start=start,
+                               full_unicode=full_unicode, schedule=schedule)
\ No newline at end of file
@@ -0,0 +1,161 @@
+# 密钥生成
+# 随机源为 secrets（操作系统的密码学安全随机数），不依赖也不修改全局 random 的种子；
+# 一次取一整块随机字节，用 bytes.translate 在C层完成拒绝采样和字母表映射，可以批量生成大量密钥。
+# 不含数字或不含字母的候选密钥整体丢弃重新生成，而不是修改个别字符，结果在所有合法密钥上均匀分布。
+#
+# KeyPool 在后台线程中预先生成密钥，设置窗口点击"随机生成"时可以立即取用。
+
+import math
+import secrets
+import string
+import threading
+from collections import deque
+
+KEY_ALPHABET = string.ascii_letters + string.digits
+MIN_KEY_LENGTH = 8
+MAX_KEY_LENGTH = 32
+
+# 随机字节按 b % 62 映射到字母表；不小于248的字节会使分布不均匀，直接丢弃
+_LIMIT = 256 - 256 % len(KEY_ALPHABET)
+_TABLE = bytes(ord(KEY_ALPHABET[b % len(KEY_ALPHABET)]) for b in range(256))
+_REJECTED = bytes(range(_LIMIT, 256))
+
+# 密钥池中每种长度保留的密钥数，以及触发后台补充的下限
+POOL_SIZE = 64
+POOL_LOW_WATER = 16
+
+def random_chars(count):
+    """
+    生成均匀分布的字母数字字符
+    :param count: 字符数
+    :return: 字符串
+    """
+    chunks = []
+    missing = count
+    while missing > 0:
+        # 按接受率多取一些字节，通常一次就够
+        raw = secrets.token_bytes(missing + missing // 16 + 16)
+        chunk = raw.translate(_TABLE, _REJECTED)
+        chunks.append(chunk)
+        missing -= len(chunk)
+    return b''.join(chunks)[:count].decode('ascii')
+
+def _acceptance(length):
+    """长度为length的随机字母数字串同时含字母和数字的概率"""
+    letters = len(string.ascii_letters) / len(KEY_ALPHABET)
+    digits = len(string.digits) / len(KEY_ALPHABET)
+    return 1 - letters ** length - digits ** length
+
+def generate_keys(count, length=16):
+    """
+    批量生成随机密钥，每个密钥都能通过 key_transform.validate_key
+    :param count: 密钥数量
+    :param length: 密钥长度（8-32）
+    :return: 密钥列表
+    """
+    if not MIN_KEY_LENGTH <= length <= MAX_KEY_LENGTH:
+        raise ValueError(f"密钥长度必须在{MIN_KEY_LENGTH}-{MAX_KEY_LENGTH}之间")
+    keys = []
+    acceptance = _acceptance(length)
+    while len(keys) < count:
+        batch = math.ceil((count - len(keys)) / acceptance) + 1
+        text = random_chars(batch * length)
+        candidates = [text[i:i + length] for i in range(0, len(text), length)]
+        # 候选密钥只含字母和数字：isalpha() 为真说明没有数字，isdigit() 为真说明没有字母
+        keys.extend(key for key in candidates if not key.isalpha() and not key.isdigit())
+    del keys[count:]
+    return keys
+
+class KeyPool:
+    """
+    后台补充的预生成密钥池，按长度分别保存
+    每个密钥取出后即从池中移除，不会重复发放
+    :param size: 每种长度保留的密钥数
+    :param low_water: 剩余数量低于该值时唤醒后台线程补充
+    """
+
+    def __init__(self, size=POOL_SIZE, low_water=POOL_LOW_WATER):
+        self.size = size
+        self.low_water = low_water
+        self._keys = {}
+        self._wanted = set()
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._thread = None
+        self._closed = False
+
+    def prefill(self, length=16):
+        """
+        请求后台线程把指定长度的密钥补满（立即返回）
+        :param length: 密钥长度
+        """
+        if not MIN_KEY_LENGTH <= length <= MAX_KEY_LENGTH:
+            raise ValueError(f"密钥长度必须在{MIN_KEY_LENGTH}-{MAX_KEY_LENGTH}之间")
+        with self._lock:
+            if self._closed:
+                return
+            self._wanted.add(length)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='key-pool', daemon=True)
+                self._thread.start()
+        self._event.set()
+
+    def get(self, length=16):
+        """
+        取一个密钥；池中没有时直接生成
+        :param length: 密钥长度
+        :return: 密钥
+        """
+        with self._lock:
+            keys = self._keys.get(length)
+            key = keys.popleft() if keys else None
+            low = keys is None or len(keys) < self.low_water
+        if low:
+            self.prefill(length)
+        return key if key is not None else generate_keys(1, length)[0]
+
+    def available(self, length=16):
+        """池中指定长度的密钥数"""
+        with self._lock:
+            return len(self._keys.get(length, ()))
+
+    def close(self):
+        """停止后台线程并丢弃池中的密钥"""
+        with self._lock:
+            self._closed = True
+            self._keys.clear()
+        self._event.set()
+
+    def _run(self):
+        while True:
+            self._event.wait()
+            with self._lock:
+                if self._closed:
+                    return
+                self._event.clear()
+                lengths = list(self._wanted)
+                self._wanted.clear()
+            for length in lengths:
+                with self._lock:
+                    missing = self.size - len(self._keys.get(length, ()))
+                if missing <= 0:
+                    continue
+                keys = generate_keys(missing, length)
+                with self._lock:
+                    if self._closed:
+                        return
+                    self._keys.setdefault(length, deque()).extend(keys)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_key_pool():
+    """
+    应用共用的密钥池（首次调用时创建）
+    :return: KeyPool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = KeyPool()
+        return _pool
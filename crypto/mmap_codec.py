@@ -0,0 +1,171 @@
+# 内存映射文件加解密
+# 用 mmap 映射定长码元文件（UTF-16LE 或 UTF-32LE），按块在 memoryview 切片上做密钥变换，
+# 可原地改写，也可写入第二个映射的输出文件；只分配与块大小相当的内存，可处理大于内存的文件
+#
+#   UTF-16LE：每个16位码元做无损变换（与 key_transform.transform_units 一致）
+#   UTF-32LE：每个码点做全码位变换（与 full_unicode=True 一致），结果仍是合法的UTF-32
+#
+# 是否保留BOM只在加密时决定：解密时开头的BOM一律视为保留下来的BOM。
+# 因此加密不带BOM的文件时，若第一个码元恰好被加密为 U+FEFF 则直接报错（可加上BOM或使用 --no-bom），
+# 保证 decrypt(encrypt(x)) == x。
+#
+# 用法：python -m crypto.mmap_codec encrypt big.txt -k abc12345 [-o out.txt] [--utf32]
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from array import array
+
+from . import key_transform, vectorized
+from .streaming import positive_int
+
+# 每块处理的码元数
+CHUNK_UNITS = 1 << 20
+
+# 字节序标记（BOM），默认保留不变换
+UTF16_BOM = b'\xff\xfe'
+UTF32_BOM = b'\xff\xfe\x00\x00'
+
+def _transform_utf16(view, plan, encrypt, start):
+    """原地变换一块UTF-16LE码元"""
+    if vectorized.is_available():
+        codes = vectorized.np.frombuffer(view, dtype='<u2')
+        view[:] = vectorized.transform_codes(codes, plan, encrypt, start, fix_zero=False).astype('<u2').tobytes()
+        return
+    units = array('H')
+    units.frombytes(view)
+    if sys.byteorder != 'little':
+        units.byteswap()
+    view[:] = key_transform.transform_units(units, plan.key, encrypt, start=start)
+
+def _transform_utf32(view, plan, encrypt, start):
+    """原地变换一块UTF-32LE码点"""
+    if vectorized.is_available():
+        np = vectorized.np
+        codes = np.frombuffer(view, dtype='<u4')
+        if ((codes >= key_transform.SURROGATE_START) & (codes < key_transform.SURROGATE_END)).any() \
+                or (codes > 0x10FFFF).any():
+            raise ValueError(f"第{start + 1}个码点附近含有非法的Unicode标量值")
+        view[:] = vectorized.transform_full_codes(codes, plan, encrypt, start).astype('<u4').tobytes()
+        return
+    # 无numpy时逐块解码为字符串，由全码位逐字符实现处理（非法码点会在解码时报错）
+    text = bytes(view).decode('utf-32-le')
+    view[:] = key_transform.apply_key_transform(text, plan.key, encrypt, start=start,
+                                                full_unicode=True).encode('utf-32-le')
+
+def _check_first_unit(path, unit_size, bom, transform, plan):
+    """
+    加密时确认不带BOM的文件的第一个码元不会被加密为BOM，否则解密时会被当作BOM保留而无法还原
+    """
+    with open(path, 'rb') as f:
+        first = bytearray(f.read(unit_size))
+    if first == bom:
+        return
+    with memoryview(first) as view:
+        transform(view, plan, True, 0)
+    if first == bom:
+        raise ValueError("文件没有字节序标记，但第一个码元加密后恰好是 U+FEFF，解密时无法与字节序标记区分；"
+                         "请在文件开头加上字节序标记，或加解密时都不保留字节序标记（--no-bom）")
+
+def _run(src_map, dst_map, size, unit_size, bom, keep_bom, transform, plan, encrypt,
+         chunk_units, progress):
+    """按块处理映射区域；src_map 与 dst_map 相同时即为原地改写"""
+    offset = 0
+    if keep_bom and src_map[:len(bom)] == bom:
+        offset = len(bom)
+        if dst_map is not src_map:
+            dst_map[:offset] = bom
+    chunk_bytes = chunk_units * unit_size
+    position = 0  # 参与变换的码元序号（不含BOM），决定每个码元使用的变换槽位
+    with memoryview(dst_map) as dst_view:
+        while offset < size:
+            end = min(offset + chunk_bytes, size)
+            view = dst_view[offset:end]
+            if dst_map is not src_map:
+                view[:] = src_map[offset:end]
+            transform(view, plan, encrypt, position)
+            view.release()
+            position += (end - offset) // unit_size
+            offset = end
+            if progress:
+                progress(offset, size)
+
+def transform_file(path, key, encrypt=True, output=None, utf32=False, keep_bom=True,
+                   chunk_units=CHUNK_UNITS, progress=None):
+    """
+    对定长码元文件做内存映射加密/解密
+    :param path: 输入文件路径
+    :param key: 密钥
+    :param encrypt: True为加密，False为解密
+    :param output: 输出文件路径，None表示原地改写输入文件
+    :param utf32: True按UTF-32LE码点处理，False按UTF-16LE码元处理
+    :param keep_bom: 文件以字节序标记开头时保留它不参与变换，加密和解密时必须一致
+    :param chunk_units: 每块处理的码元数
+    :param progress: 可选回调 progress(已处理字节数, 总字节数)
+    :return: 统计信息字典（bytes、seconds、mb_per_sec）
+    """
+    if chunk_units < 1:
+        # 块大小不为正时分块循环无法前进
+        raise ValueError(f"每块码元数必须大于0: {chunk_units}")
+    plan = key_transform.get_key_plan(key)
+    unit_size = 4 if utf32 else 2
+    bom = UTF32_BOM if utf32 else UTF16_BOM
+    transform = _transform_utf32 if utf32 else _transform_utf16
+
+    size = os.path.getsize(path)
+    if size % unit_size:
+        raise ValueError(f"文件长度 {size} 不是 {unit_size} 字节的整数倍，不是{'UTF-32' if utf32 else 'UTF-16'}码元文件")
+
+    if encrypt and keep_bom and size:
+        _check_first_unit(path, unit_size, bom, transform, plan)
+
+    started = time.perf_counter()
+    if output is not None and os.path.abspath(output) != os.path.abspath(path):
+        # 输出文件预先扩展到相同大小后映射，按块复制并变换
+        with open(path, 'rb') as src, open(output, 'w+b') as dst:
+            dst.truncate(size)
+            if size:
+                with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as src_map, \
+                        mmap.mmap(dst.fileno(), 0, access=mmap.ACCESS_WRITE) as dst_map:
+                    _run(src_map, dst_map, size, unit_size, bom, keep_bom, transform, plan,
+                         encrypt, chunk_units, progress)
+    else:
+        with open(path, 'r+b') as f:
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as m:
+                    _run(m, m, size, unit_size, bom, keep_bom, transform, plan,
+                         encrypt, chunk_units, progress)
+
+    seconds = time.perf_counter() - started
+    return {
+        'bytes': size,
+        'seconds': seconds,
+        'mb_per_sec': size / seconds / 1e6 if seconds else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m crypto.mmap_codec',
+                                     description='内存映射方式加密/解密UTF-16LE或UTF-32LE文件')
+    parser.add_argument('action', choices=('encrypt', 'decrypt'))
+    parser.add_argument('path', help='输入文件')
+    parser.add_argument('-k', '--key', required=True, help='密钥')
+    parser.add_argument('-o', '--output', help='输出文件，省略时原地改写')
+    parser.add_argument('--utf32', action='store_true', help='按UTF-32LE码点处理（默认UTF-16LE）')
+    parser.add_argument('--no-bom', action='store_true', help='字节序标记也参与变换（加密和解密时须一致）')
+    parser.add_argument('--chunk-units', type=positive_int, default=CHUNK_UNITS, help='每块处理的码元数')
+    args = parser.parse_args(argv)
+
+    try:
+        stats = transform_file(args.path, args.key, args.action == 'encrypt', args.output,
+                               utf32=args.utf32, keep_bom=not args.no_bom, chunk_units=args.chunk_units)
+    except (ValueError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    rate = f"{stats['mb_per_sec']:.1f} MB/s" if stats['mb_per_sec'] else '-'
+    print(f"{stats['bytes']} 字节，耗时 {stats['seconds']:.3f}s，吞吐量 {rate}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
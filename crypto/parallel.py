@@ -0,0 +1,174 @@
+# 多进程并行密钥变换
+# 密钥变换每个字符只取决于自身和 位置 mod 变换数，因此可以把一段超长文本切成按变换数对齐的若干段，
+# 分给进程池并行处理。码点数组放在共享内存（multiprocessing.shared_memory）中，
+# 各进程原地改写自己负责的一段，数据不经过pickle，结果直接从共享内存解码成文本
+#
+#   from crypto import parallel
+#   cipher = parallel.parallel_transform(text, 'abc12345', encrypt=True, workers=8)
+#
+# 调用方常常是多线程进程（界面的后台QThread、服务的线程池），在其中fork可能复制到其他线程持有的锁而死锁，
+# 因此工作进程用 forkserver（不支持时用 spawn）启动，不从调用进程直接fork。
+# 这两种方式会在工作进程中重新导入主模块，直接运行的脚本需要把调用放在 if __name__ == '__main__': 之下。
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+from . import key_transform, vectorized
+
+# 文本短于该长度（字符数）时直接在当前进程处理，进程间调度的开销得不偿失
+PARALLEL_THRESHOLD = 4 * 1024 * 1024
+
+# 每段至少包含的字符数
+MIN_SEGMENT = 256 * 1024
+
+# UTF-32 每个码点4字节
+_UNIT = 4
+
+# 工作进程的启动方式：不直接fork调用进程
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_pool = None
+_pool_workers = 0
+# 各进程池正在使用它的调用数；被更大的进程池替换后，由最后一个调用负责关闭
+_pool_users = {}
+_pool_lock = threading.Lock()
+
+@contextmanager
+def _use_pool(workers):
+    """
+    在调用期间占用进程池，需要更多进程时新建并替换共享的进程池
+    多个线程可能同时调用：被替换的进程池仍有调用在提交任务时不会关闭，等最后一个调用结束后再关闭
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            _retire()
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context(START_METHOD))
+            _pool_workers = workers
+        pool = _pool
+        _pool_users[pool] = _pool_users.get(pool, 0) + 1
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            count = _pool_users.pop(pool, 1) - 1
+            if count:
+                _pool_users[pool] = count
+            stale = not count and pool is not _pool
+        if stale:
+            pool.shutdown()
+
+def _retire():
+    """让出共享的进程池，没有调用在使用时立即关闭（需持有 _pool_lock）"""
+    global _pool, _pool_workers
+    if _pool is not None and _pool not in _pool_users:
+        _pool.shutdown(wait=False)
+    _pool = None
+    _pool_workers = 0
+
+def shutdown():
+    """关闭全部进程池（退出时自动调用）"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        pools = set(_pool_users)
+        if _pool is not None:
+            pools.add(_pool)
+        _pool = None
+        _pool_workers = 0
+        _pool_users.clear()
+    for pool in pools:
+        pool.shutdown()
+
+atexit.register(shutdown)
+
+def split_segments(length, size, workers, min_segment=MIN_SEGMENT):
+    """
+    把文本切成按变换数对齐的段，除最后一段外每段长度都是 size 的整数倍
+    :param length: 文本长度
+    :param size: 变换数（KeyPlan.size）
+    :param workers: 进程数
+    :param min_segment: 每段最少字符数
+    :return: [(偏移, 长度), ...]
+    """
+    segment = max(-(-length // workers), min_segment)
+    segment = -(-segment // size) * size
+    return [(offset, min(segment, length - offset)) for offset in range(0, length, segment)]
+
+def _transform_segment(name, offset, count, key, encrypt, start, full_unicode):
+    """子进程：原地变换共享内存中的一段码点"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        with shm.buf[offset * _UNIT:(offset + count) * _UNIT] as view:
+            if vectorized.is_available():
+                plan = key_transform.get_key_plan(key)
+                codes = vectorized.np.frombuffer(view, dtype='<u4')
+                if full_unicode:
+                    result = vectorized.transform_full_codes(codes, plan, encrypt, start)
+                else:
+                    result = vectorized.transform_codes(codes, plan, encrypt, start)
+                codes[:] = result
+                # numpy数组引用需在view释放前销毁
+                del codes
+            else:
+                text = str(view, 'utf-32-le', 'surrogatepass')
+                view[:] = key_transform.apply_key_transform(
+                    text, key, encrypt, start=start, full_unicode=full_unicode
+                ).encode('utf-32-le', 'surrogatepass')
+    finally:
+        shm.close()
+
+def parallel_transform(text, key, encrypt=True, workers=None, start=0, full_unicode=False,
+                       threshold=PARALLEL_THRESHOLD):
+    """
+    多进程并行密钥变换，结果与 key_transform.apply_key_transform 完全一致
+    :param text: 要变换的文本
+    :param key: 密钥
+    :param encrypt: True为加密，False为解密
+    :param workers: 进程数，None为CPU核数
+    :param start: 文本首字符在整段数据中的位置
+    :param full_unicode: 是否使用全码位模式
+    :param threshold: 文本短于该长度时不启用多进程
+    :return: 变换后的文本
+    """
+    if not text:
+        return text
+
+    # 在主进程中先验证密钥和输入，错误不必经过子进程传回
+    plan = key_transform.get_key_plan(key)
+    if full_unicode:
+        key_transform.check_scalars(text)
+
+    workers = workers or os.cpu_count() or 1
+    length = len(text)
+    segments = split_segments(length, plan.size, workers) if length >= threshold else []
+    if len(segments) < 2:
+        return key_transform.apply_key_transform(text, key, encrypt, start=start, full_unicode=full_unicode)
+
+    shm = shared_memory.SharedMemory(create=True, size=length * _UNIT)
+    try:
+        shm.buf[:length * _UNIT] = text.encode('utf-32-le', 'surrogatepass')
+        with _use_pool(workers) as pool:
+            futures = [pool.submit(_transform_segment, shm.name, offset, count, key, encrypt,
+                                   start + offset, full_unicode)
+                       for offset, count in segments]
+            for future in futures:
+                future.result()
+        with shm.buf[:length * _UNIT] as view:
+            return str(view, 'utf-32-le', 'surrogatepass')
+    finally:
+        shm.close()
+        shm.unlink()
+
+def encrypt_with_key(text, key, workers=None, start=0, full_unicode=False):
+    """并行密钥加密"""
+    return parallel_transform(text, key, True, workers, start, full_unicode)
+
+def decrypt_with_key(text, key, workers=None, start=0, full_unicode=False):
+    """并行密钥解密"""
+    return parallel_transform(text, key, False, workers, start, full_unicode)
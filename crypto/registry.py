@@ -0,0 +1,107 @@
+# 编解码算法注册表
+# 图形界面和命令行都通过这里发现可用算法，不再硬编码下标分支
+# 模块在第一次使用时才导入，启动时只加载实际选中的算法
+
+import importlib
+
+class CodecInfo:
+    """
+    编解码算法描述
+    :param name: 算法标识（命令行参数、配置中使用）
+    :param module: crypto 包内的模块名
+    :param title: 显示名称
+    :param description: 原理说明
+    :param streaming: 是否提供 encrypt_stream/decrypt_stream
+    :param bulk: 是否提供批量接口
+    :param vectorized: 密钥变换是否可走向量化/查表引擎
+    :param flags: 其他能力标记
+    """
+
+    def __init__(self, name, module, title, description, streaming=False, bulk=False,
+                 vectorized=False, flags=()):
+        self.name = name
+        self.module = module
+        self.title = title
+        self.description = description
+        self.streaming = streaming
+        self.bulk = bulk
+        self.vectorized = vectorized
+        self.flags = frozenset(flags)
+        self._codec = None
+
+    @property
+    def codec(self):
+        """编解码模块（首次访问时导入）"""
+        if self._codec is None:
+            self._codec = importlib.import_module(f'.{self.module}', __package__)
+        return self._codec
+
+    def is_loaded(self):
+        return self._codec is not None
+
+    def has_flag(self, flag):
+        return flag in self.flags
+
+    def __repr__(self):
+        return f"CodecInfo({self.name!r}, module={self.module!r})"
+
+# 能力标记
+FLAG_KEY = 'key'                        # 支持密钥增强
+FLAG_POSITION_LOCAL = 'position_local'  # 每个输出字符只取决于同位置的输入字符，提供 encrypt_at/decrypt_at
+FLAG_ASCII_OUTPUT = 'ascii_output'      # 密文只含ASCII字符
+FLAG_FULL_UNICODE = 'full_unicode'      # 支持全码位模式（full_unicode=True）
+FLAG_BYTES = 'bytes'                    # 提供 encrypt_bytes/decrypt_bytes 字节接口
+FLAG_SCHEDULE = 'schedule'              # encrypt 支持 schedule 参数选择密钥编排，decrypt 按密文版本头识别
+
+_registry = {}
+
+def register_codec(info):
+    """
+    注册编解码算法，同名算法会被覆盖
+    :param info: CodecInfo
+    """
+    _registry[info.name] = info
+    return info
+
+def get_codec_info(name):
+    """
+    获取算法描述
+    :param name: 算法标识
+    :return: CodecInfo
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"未知算法: {name}") from None
+
+def get_codec(name):
+    """
+    获取算法模块（按需导入）
+    :param name: 算法标识
+    :return: 提供 encrypt/decrypt 的模块
+    """
+    return get_codec_info(name).codec
+
+def list_codecs():
+    """
+    按注册顺序列出所有算法
+    :return: CodecInfo 列表
+    """
+    return list(_registry.values())
+
+def codec_names():
+    return [info.name for info in _registry.values()]
+
+register_codec(CodecInfo(
+    'unicode', 'unicode_shift', 'Unicode复合变换（支持中文）',
+    '基于密钥的多步骤数学变换：\n1. 密钥MD5哈希生成变换参数（乘法因子、偏移量、位移、XOR掩码）\n2. 仿射变换：(字符码×乘法因子+偏移) mod 65536\n3. 循环位移：16位循环左移操作\n4. XOR变换：与密钥衍生掩码异或\n解密需相同密钥进行严格逆向运算。',
+    streaming=True, bulk=True, vectorized=True,
+    flags=(FLAG_KEY, FLAG_POSITION_LOCAL, FLAG_FULL_UNICODE, FLAG_SCHEDULE),
+))
+
+register_codec(CodecInfo(
+    'base64', 'base64_codec', 'Base64密钥增强（支持中文）',
+    '先进行Unicode复合变换，再Base64编码的双重加密：\n1. 使用密钥对文本进行复合数学变换\n2. 将变换结果进行Base64编码\n解密时需先Base64解码，再用相同密钥逆向变换。\n提供更高的安全性和复杂度。',
+    streaming=True, bulk=True, vectorized=True,
+    flags=(FLAG_KEY, FLAG_ASCII_OUTPUT, FLAG_FULL_UNICODE, FLAG_BYTES, FLAG_SCHEDULE),
+))
@@ -0,0 +1,183 @@
+# 密钥编排
+# 把密钥展开为各变换槽位的参数（乘法因子、加法偏移、位移量、XOR掩码）。
+#   md5      版本1，默认：MD5十六进制摘要每8个字符一组，固定4个槽位（原有算法，密文保持兼容）
+#   blake2b  版本2：BLAKE2b 计数器模式输出摘要字节
+#   shake256 版本3：SHAKE256 直接输出所需长度的摘要字节
+# 新编排的槽位数可在 4-256 之间选择，每个槽位从摘要中取6字节（'<HHBB'）用 struct 一次解出。
+# 编排名称写作 'blake2b' 或 'blake2b:64'（冒号后为槽位数，省略时为 DEFAULT_SLOTS）。
+#
+# 使用非默认编排加密时，密文前加上版本头 '$ks<版本>.<槽位数>$'，解密时据此选择编排，
+# 不带版本头的密文按默认的 md5 编排处理。
+
+import hashlib
+import itertools
+import re
+import struct
+
+DEFAULT_SCHEDULE = 'md5'
+DEFAULT_SLOTS = 16
+MIN_SLOTS = 4
+MAX_SLOTS = 256
+
+# 每个槽位的参数：乘法因子、加法偏移（各16位）、位移量、XOR掩码（各8位）
+_SLOT_FORMAT = struct.Struct('<HHBB')
+
+_HEADER_RE = re.compile(r'\$ks(\d{1,3})\.(\d{1,3})\$')
+# 版本头的最大长度：'$ks' + 3位版本 + '.' + 3位槽位数 + '$'
+MAX_HEADER_LENGTH = 12
+
+def _blake2b_digest(key, slots):
+    """BLAKE2b 单次最多输出64字节，按计数器（放在salt中）依次生成后拼接"""
+    data = key.encode('utf-8')
+    size = _SLOT_FORMAT.size * slots
+    blocks = []
+    for counter in range(-(-size // 64)):
+        blocks.append(hashlib.blake2b(data, digest_size=64, person=b'keysched',
+                                      salt=struct.pack('<QQ', counter, slots)).digest())
+    return b''.join(blocks)[:size]
+
+def _shake256_digest(key, slots):
+    return hashlib.shake_256(f'keysched:{slots}:'.encode('ascii') + key.encode('utf-8')).digest(
+        _SLOT_FORMAT.size * slots)
+
+class KeySchedule:
+    """
+    一种密钥编排
+    :param name: 名称
+    :param version: 写入版本头的编号
+    :param digest: digest(密钥, 槽位数) -> 摘要字节，None表示原有的MD5编排
+    """
+
+    def __init__(self, name, version, digest=None):
+        self.name = name
+        self.version = version
+        self.digest = digest
+
+    def transforms(self, key, slots):
+        """
+        将密钥展开为变换参数序列
+        :param key: 已校验的密钥
+        :param slots: 槽位数
+        :return: 变换参数字典列表，格式与 key_transform.key_to_transform_sequence 相同
+        """
+        if self.digest is None:
+            from .key_transform import key_to_transform_sequence
+            return key_to_transform_sequence(key)
+        transforms = []
+        for mult, add, shift, xor in _SLOT_FORMAT.iter_unpack(memoryview(self.digest(key, slots))):
+            # 奇数与65536互质；排除恒等的乘法因子1
+            mult |= 1
+            transforms.append({
+                'mult': 3 if mult == 1 else mult,
+                'add': add,
+                'shift': shift & 15,
+                'xor': xor,
+            })
+        return transforms
+
+    def __repr__(self):
+        return f"KeySchedule({self.name!r}, version={self.version})"
+
+_schedules = {}
+_versions = {}
+
+def register_schedule(schedule):
+    """
+    注册密钥编排
+    :param schedule: KeySchedule
+    """
+    _schedules[schedule.name] = schedule
+    _versions[schedule.version] = schedule
+    return schedule
+
+register_schedule(KeySchedule('md5', 1))
+register_schedule(KeySchedule('blake2b', 2, _blake2b_digest))
+register_schedule(KeySchedule('shake256', 3, _shake256_digest))
+
+def schedule_names():
+    return list(_schedules)
+
+def resolve(schedule):
+    """
+    规范化编排名称
+    :param schedule: None、'blake2b'、'blake2b:64' 等
+    :return: (规范名称, KeySchedule, 槽位数)，规范名称如 'md5'、'blake2b:16'
+    """
+    if schedule is None:
+        schedule = DEFAULT_SCHEDULE
+    name, _, slots = schedule.partition(':')
+    info = _schedules.get(name)
+    if info is None:
+        raise ValueError(f"未知的密钥编排: {name}")
+    if info.digest is None:
+        if slots and int(slots) != 4:
+            raise ValueError(f"{name} 编排固定为4个槽位")
+        return name, info, 4
+    try:
+        slots = int(slots) if slots else DEFAULT_SLOTS
+    except ValueError:
+        raise ValueError(f"槽位数必须是整数: {schedule}") from None
+    if not MIN_SLOTS <= slots <= MAX_SLOTS:
+        raise ValueError(f"槽位数必须在{MIN_SLOTS}-{MAX_SLOTS}之间")
+    return f'{name}:{slots}', info, slots
+
+def is_default(schedule):
+    return schedule is None or resolve(schedule)[0] == DEFAULT_SCHEDULE
+
+def schedule_id(schedule):
+    """
+    编排的二进制标识
+    :return: (版本, 槽位数)
+    """
+    _, info, slots = resolve(schedule)
+    return info.version, slots
+
+def from_id(version, slots):
+    """
+    由二进制标识还原编排名称
+    :return: 规范名称
+    """
+    info = _versions.get(version)
+    if info is None:
+        raise ValueError(f"未知的密钥编排版本: {version}")
+    return resolve(info.name if info.digest is None else f'{info.name}:{slots}')[0]
+
+def header(schedule):
+    """
+    密文版本头，默认编排返回空字符串
+    :param schedule: 编排名称
+    :return: 版本头
+    """
+    if is_default(schedule):
+        return ''
+    version, slots = schedule_id(schedule)
+    return f'$ks{version}.{slots}$'
+
+def split_header(text):
+    """
+    拆分密文版本头
+    :param text: 密文
+    :return: (编排规范名称，无版本头时为None, 去掉版本头的密文)
+    """
+    if not text.startswith('$ks'):
+        return None, text
+    match = _HEADER_RE.match(text)
+    if match is None:
+        return None, text
+    return from_id(int(match.group(1)), int(match.group(2))), text[match.end():]
+
+def split_stream_header(chunks):
+    """
+    拆分密文流开头的版本头（版本头可能跨越多个块）
+    :param chunks: 密文块的可迭代对象
+    :return: (编排规范名称，无版本头时为None, 去掉版本头的密文块迭代器)
+    """
+    chunks = iter(chunks)
+    head = ''
+    for chunk in chunks:
+        head += chunk
+        # 凑够最大长度、已能完整匹配，或开头已不可能是版本头时停止读取
+        if len(head) >= MAX_HEADER_LENGTH or not head.startswith('$ks'[:len(head)]) or _HEADER_RE.match(head):
+            break
+    schedule, head = split_header(head)
+    return schedule, itertools.chain((head,), chunks)
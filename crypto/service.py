@@ -0,0 +1,230 @@
+# 本地加解密服务
+# 通过Unix域套接字或本机TCP提供各算法的加密/解密，多个进程共用同一份已预热的密钥变换计划缓存
+#
+# 协议：每帧为4字节大端长度 + UTF-8 JSON（允许代理项码点，按 surrogatepass 编码）
+#   请求：{"id": 1, "op": "encrypt", "codec": "unicode", "text": "...", "key": null, "full_unicode": false}
+#   响应：{"id": 1, "ok": true, "result": "..."} 或 {"id": 1, "ok": false, "error": "..."}
+#   加密请求可带 "schedule": "blake2b:64" 选择密钥编排（解密按密文版本头识别）
+# 同一连接上可连续发送多个请求（流水线），响应按完成顺序返回，用id对应
+# 其他操作：{"op": "ping"}、{"op": "stats"}
+#
+# 用法：python -m crypto.service --unix /tmp/crypto.sock
+#      python -m crypto.service --port 8765
+
+import argparse
+import asyncio
+import json
+import os
+import stat
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from . import key_transform, registry
+
+DEFAULT_PORT = 8765
+
+# 单帧最大长度，超过则断开连接
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+# 文本长度不超过该值的请求直接在事件循环中处理，更长的放到线程池
+INLINE_LIMIT = 4096
+
+# 单个连接上同时处理的请求数上限
+MAX_PIPELINE = 64
+
+_HEADER = struct.Struct('>I')
+
+class ProtocolError(Exception):
+    """帧格式错误"""
+
+def encode_frame(message):
+    """
+    将消息编码为一帧
+    :param message: 可JSON序列化的字典
+    :return: bytes
+    """
+    body = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8', 'surrogatepass')
+    return _HEADER.pack(len(body)) + body
+
+async def read_frame(reader, max_size=MAX_FRAME_SIZE):
+    """
+    读取一帧
+    :return: 消息字典，连接正常关闭时返回None
+    """
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ProtocolError("帧头不完整") from None
+    (length,) = _HEADER.unpack(header)
+    if length > max_size:
+        raise ProtocolError(f"帧长度 {length} 超过上限 {max_size}")
+    body = await reader.readexactly(length)
+    try:
+        return json.loads(body.decode('utf-8', 'surrogatepass'))
+    except ValueError as e:
+        raise ProtocolError(f"无法解析请求: {e}") from None
+
+def handle_request(request):
+    """
+    执行一个加密/解密请求（同步，可在线程池中运行）
+    :return: 结果文本
+    """
+    op = request.get('op')
+    if op not in ('encrypt', 'decrypt'):
+        raise ValueError(f"未知操作: {op}")
+    codec = registry.get_codec(request.get('codec', 'unicode'))
+    func = codec.encrypt if op == 'encrypt' else codec.decrypt
+    kwargs = {}
+    if request.get('full_unicode'):
+        kwargs['full_unicode'] = True
+    if op == 'encrypt' and request.get('schedule'):
+        kwargs['schedule'] = request['schedule']
+    return func(request.get('text', ''), request.get('key') or None, **kwargs)
+
+class CryptoServer:
+    """
+    asyncio加解密服务
+    :param workers: 处理长文本请求的线程数
+    """
+
+    def __init__(self, workers=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+        self.server = None
+        self.requests = 0
+        self.connections = 0
+
+    async def start(self, path=None, host='127.0.0.1', port=DEFAULT_PORT):
+        """
+        开始监听
+        :param path: Unix域套接字路径，提供时忽略host/port；已存在的旧套接字会被替换，其他文件则拒绝覆盖
+        """
+        if path:
+            try:
+                mode = os.lstat(path).st_mode
+            except FileNotFoundError:
+                pass
+            else:
+                if not stat.S_ISSOCK(mode):
+                    raise FileExistsError(f"{path} 已存在且不是套接字，拒绝覆盖")
+                os.remove(path)
+            self.server = await asyncio.start_unix_server(self._serve_client, path=path)
+        else:
+            self.server = await asyncio.start_server(self._serve_client, host=host, port=port)
+        return self.server
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    def stats(self):
+        cache = key_transform.plan_cache_info()
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'plan_cache': {'hits': cache.hits, 'misses': cache.misses, 'size': cache.currsize},
+        }
+
+    async def _serve_client(self, reader, writer):
+        self.connections += 1
+        write_lock = asyncio.Lock()
+        slots = asyncio.Semaphore(MAX_PIPELINE)
+        pending = set()
+
+        async def respond(message):
+            async with write_lock:
+                writer.write(encode_frame(message))
+                await writer.drain()
+
+        async def process(request):
+            try:
+                response = await self._dispatch(request)
+                await respond(response)
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            finally:
+                slots.release()
+
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except ProtocolError as e:
+                    await respond({'id': None, 'ok': False, 'error': str(e)})
+                    break
+                if request is None:
+                    break
+                await slots.acquire()
+                task = asyncio.ensure_future(process(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _dispatch(self, request):
+        request_id = request.get('id') if isinstance(request, dict) else None
+        if not isinstance(request, dict):
+            return {'id': None, 'ok': False, 'error': '请求必须是JSON对象'}
+        self.requests += 1
+        op = request.get('op')
+        if op == 'ping':
+            return {'id': request_id, 'ok': True, 'result': 'pong'}
+        if op == 'stats':
+            return {'id': request_id, 'ok': True, 'result': self.stats()}
+        try:
+            text = request.get('text') or ''
+            if len(text) <= INLINE_LIMIT:
+                result = handle_request(request)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.executor, handle_request, request)
+            return {'id': request_id, 'ok': True, 'result': result}
+        except Exception as e:
+            return {'id': request_id, 'ok': False, 'error': str(e)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m crypto.service', description='本地加解密服务')
+    parser.add_argument('--unix', metavar='PATH', help='监听Unix域套接字')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP监听地址（默认127.0.0.1）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'TCP端口（默认{DEFAULT_PORT}）')
+    parser.add_argument('--workers', type=int, default=None, help='处理长文本的线程数')
+    parser.add_argument('--warm-key', action='append', default=[], help='启动时预热的密钥，可重复')
+    args = parser.parse_args(argv)
+
+    for key in args.warm_key:
+        key_transform.get_key_plan(key)
+
+    async def run():
+        server = CryptoServer(args.workers)
+        await server.start(args.unix, args.host, args.port)
+        where = args.unix or f'{args.host}:{args.port}'
+        print(f"加解密服务已启动: {where}", file=sys.stderr)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"服务启动失败: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
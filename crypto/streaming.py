@@ -0,0 +1,48 @@
+# 流式处理工具
+# 以固定大小分块读取输入，配合各编解码模块的 encrypt_stream/decrypt_stream 实现恒定内存处理
+# 文本文件请以 newline='' 打开，避免换行符被转换后破坏密文；
+# 带密钥的Unicode密文可能含孤立代理项，写文件时需使用 errors='surrogatepass'
+
+import argparse
+
+# 默认每块读取的字符数
+CHUNK_SIZE = 1 << 20
+
+def positive_int(text):
+    """命令行块大小参数的类型：必须是正整数"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"不是整数: {text}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"必须大于0: {value}")
+    return value
+
+def iter_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    """
+    按固定大小分块读取文件对象
+    :param fileobj: 支持 read(size) 的文件对象
+    :param chunk_size: 每块大小
+    :return: 数据块生成器
+    """
+    # 0 会读出空块被当作输入结束，负数会一次读入整个文件
+    if chunk_size < 1:
+        raise ValueError(f"块大小必须大于0: {chunk_size}")
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def write_stream(pieces, fileobj):
+    """
+    将生成器输出依次写入文件对象
+    :param pieces: 数据块可迭代对象
+    :param fileobj: 支持 write 的文件对象
+    :return: 写入的总长度
+    """
+    total = 0
+    for piece in pieces:
+        fileobj.write(piece)
+        total += len(piece)
+    return total
@@ -1,44 +1,206 @@
 # Unicode码位移加密，支持中英文
 # 加密：每个字符的Unicode码+3，解密：每个字符的Unicode码-3
 # 支持密钥增强加密
-from . import key_transform
+# 使用密钥时位移并入密钥变换的仿射加法常数（key_transform 的 offset 参数），每个方向只遍历一次文本，
+# 结果与先位移再变换完全一致，由 tests/test_fused_shift.py 对全部16位码点穷举验证
+from . import instrumentation, key_transform, schedules
+from .bulk import map_by_key, split_joined
+from .streaming import CHUNK_SIZE, iter_chunks, write_stream
 
 OFFSET = 3
 
-def encrypt(text, key=None):
+def _shift(text, offset, full_unicode):
+    """基础Unicode位移（全码位模式下在标量下标空间内循环位移，不会产生代理项）"""
+    started = instrumentation.clock() if instrumentation.enabled else None
+    if full_unicode:
+        result = key_transform.shift_scalars(text, offset)
+    else:
+        result = ''.join(chr(ord(c) + offset) for c in text)
+    if started is not None:
+        instrumentation.record('unicode.shift', started, len(text))
+    return result
+
+def _encrypt_chunk(text, key, engine, start, full_unicode=False, schedule=None):
+    """加密一段文本，start为其首字符在整段数据中的位置"""
+    # 如果提供了密钥，位移和密钥变换一次完成
+    if key:
+        return key_transform.apply_key_transform(text, key, True, engine, start, full_unicode, OFFSET,
+                                                 schedule)
+    
+    # 基础Unicode位移
+    return _shift(text, OFFSET, full_unicode)
+
+def _decrypt_chunk(text, key, engine, start, full_unicode=False, schedule=None):
+    """解密一段文本，start为其首字符在整段数据中的位置"""
+    # 如果提供了密钥，密钥解密和位移解密一次完成
+    if key:
+        return key_transform.apply_key_transform(text, key, False, engine, start, full_unicode, OFFSET,
+                                                 schedule)
+    
+    # 基础Unicode位移解密
+    return _shift(text, -OFFSET, full_unicode)
+
+def encrypt(text, key=None, engine=None, full_unicode=False, schedule=None):
     """Unicode位移加密
     :param text: 明文
     :param key: 可选密钥，如果提供则进行密钥增强
+    :param engine: 密钥变换引擎（'python'/'numpy'/'table'），None为自动选择
+    :param full_unicode: 全码位模式，emoji等辅助平面字符也能精确还原（与默认模式密文不兼容）
+    :param schedule: 密钥编排名称（如 'blake2b:64'），非默认编排会在密文前写入版本头
     :return: 密文
     """
     if not text:
         return text
     
-    # 基础Unicode位移
-    result = ''.join(chr(ord(c) + OFFSET) for c in text)
-    
-    # 如果提供了密钥，进行额外的密钥变换
     if key:
-        result = key_transform.encrypt_with_key(result, key)
-    
-    return result
+        return schedules.header(schedule) + _encrypt_chunk(text, key, engine, 0, full_unicode, schedule)
+    return _encrypt_chunk(text, key, engine, 0, full_unicode)
 
-def decrypt(text, key=None):
+def decrypt(text, key=None, engine=None, full_unicode=False):
     """Unicode位移解密
     :param text: 密文
-    :param key: 可选密钥，如果提供则进行密钥解密
+    :param key: 可选密钥，如果提供则进行密钥解密（密钥编排由密文版本头决定）
+    :param engine: 密钥变换引擎（'python'/'numpy'/'table'），None为自动选择
+    :param full_unicode: 全码位模式，emoji等辅助平面字符也能精确还原（与默认模式密文不兼容）
     :return: 明文
     """
     if not text:
         return text
     
-    result = text
-    
-    # 如果提供了密钥，先进行密钥解密
     if key:
-        result = key_transform.decrypt_with_key(result, key)
+        schedule, text = schedules.split_header(text)
+        return _decrypt_chunk(text, key, engine, 0, full_unicode, schedule)
+    return _decrypt_chunk(text, key, engine, 0, full_unicode)
+
+def encrypt_at(text, key=None, start=0, engine=None, full_unicode=False, schedule=None):
+    """加密整段数据中从 start 开始的一段文本
+    每个字符只取决于自身和所在位置，结果等于 encrypt(全文)[start:start + len(text)]
+    :param text: 明文片段
+    :param key: 可选密钥
+    :param start: 片段首字符在整段数据中的位置
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param schedule: 密钥编排名称（片段不含版本头）
+    :return: 密文片段
+    """
+    if not text:
+        return text
+    return _encrypt_chunk(text, key, engine, start, full_unicode, schedule)
+
+def decrypt_at(text, key=None, start=0, engine=None, full_unicode=False, schedule=None):
+    """解密整段数据中从 start 开始的一段密文，encrypt_at 的逆操作
+    :param text: 密文片段
+    :param key: 可选密钥
+    :param start: 片段首字符在整段数据中的位置
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param schedule: 密钥编排名称（片段不含版本头）
+    :return: 明文片段
+    """
+    if not text:
+        return text
+    return _decrypt_chunk(text, key, engine, start, full_unicode, schedule)
+
+def encrypt_many(records, key=None, keys=None, engine=None, full_unicode=False):
+    """Unicode位移批量加密，结果与逐条调用 encrypt 一致
+    同一密钥的记录拼接后只做一次位移和密钥变换，每条记录的变换序列仍从自身开头算起
+    :param records: 明文序列，空记录原样返回
+    :param key: 所有记录共用的密钥
+    :param keys: 逐条记录的密钥序列（与 key 二选一），相同密钥的记录会合并处理
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :return: 密文列表
+    """
+    def encrypt_group(texts, group_key):
+        lengths = [len(t) for t in texts]
+        if group_key:
+            result = key_transform.transform_joined(''.join(texts), lengths, group_key, True, engine,
+                                                    full_unicode, OFFSET)
+        else:
+            result = _shift(''.join(texts), OFFSET, full_unicode)
+        return split_joined(result, lengths)
     
-    # 基础Unicode位移解密
-    result = ''.join(chr(ord(c) - OFFSET) for c in result)
+    return map_by_key(records, encrypt_group, key, keys)
+
+def decrypt_many(records, key=None, keys=None, engine=None, full_unicode=False):
+    """Unicode位移批量解密，结果与逐条调用 decrypt 一致
+    :param records: 密文序列，空记录原样返回
+    :param key: 所有记录共用的密钥
+    :param keys: 逐条记录的密钥序列（与 key 二选一）
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :return: 明文列表
+    """
+    def decrypt_group(texts, group_key):
+        lengths = [len(t) for t in texts]
+        if group_key:
+            result = key_transform.transform_joined(''.join(texts), lengths, group_key, False, engine,
+                                                    full_unicode, OFFSET)
+        else:
+            result = _shift(''.join(texts), -OFFSET, full_unicode)
+        return split_joined(result, lengths)
     
-    return result
\ No newline at end of file
+    return map_by_key(records, decrypt_group, key, keys)
+
+def encrypt_stream(chunks, key=None, engine=None, full_unicode=False, schedule=None):
+    """Unicode位移流式加密
+    :param chunks: 明文块的可迭代对象
+    :param key: 可选密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param schedule: 密钥编排名称，非默认编排时先输出版本头
+    :return: 密文块生成器，拼接结果与 encrypt 完全一致
+    """
+    header = schedules.header(schedule) if key else ''
+    position = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if header:
+            yield header
+            header = ''
+        yield _encrypt_chunk(chunk, key, engine, position, full_unicode, schedule)
+        position += len(chunk)
+
+def decrypt_stream(chunks, key=None, engine=None, full_unicode=False):
+    """Unicode位移流式解密
+    :param chunks: 密文块的可迭代对象
+    :param key: 可选密钥（密钥编排由密文开头的版本头决定）
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :return: 明文块生成器，拼接结果与 decrypt 完全一致
+    """
+    schedule = None
+    if key:
+        schedule, chunks = schedules.split_stream_header(chunks)
+    position = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        yield _decrypt_chunk(chunk, key, engine, position, full_unicode, schedule)
+        position += len(chunk)
+
+def encrypt_file(src, dst, key=None, engine=None, chunk_size=CHUNK_SIZE, full_unicode=False, schedule=None):
+    """按块加密文本文件对象
+    :param src: 输入文件对象（文本模式）
+    :param dst: 输出文件对象（文本模式）
+    :param key: 可选密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param chunk_size: 每块读取的字符数
+    :param schedule: 密钥编排名称
+    :return: 写入的字符数
+    """
+    return write_stream(encrypt_stream(iter_chunks(src, chunk_size), key, engine, full_unicode, schedule), dst)
+
+def decrypt_file(src, dst, key=None, engine=None, chunk_size=CHUNK_SIZE, full_unicode=False):
+    """按块解密文本文件对象
+    :param src: 输入文件对象（文本模式）
+    :param dst: 输出文件对象（文本模式）
+    :param key: 可选密钥
+    :param engine: 密钥变换引擎，None为自动选择
+    :param full_unicode: 是否使用全码位模式
+    :param chunk_size: 每块读取的字符数
+    :return: 写入的字符数
+    """
+    return write_stream(decrypt_stream(iter_chunks(src, chunk_size), key, engine, full_unicode), dst)
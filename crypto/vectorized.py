@@ -0,0 +1,181 @@
+# NumPy向量化变换引擎
+# 对整段码点数组一次性完成仿射变换、16位循环位移和XOR，结果与逐字符实现完全一致
+# numpy为可选依赖，未安装时由key_transform自动回退到纯Python实现
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 取决于运行环境
+    np = None
+
+from . import key_transform
+
+
+def is_available():
+    """
+    判断向量化引擎是否可用
+    :return: 已安装numpy时返回True
+    """
+    return np is not None
+
+
+def text_to_codes(text):
+    """
+    将文本转换为uint32码点数组（不复制字符，只做一次UTF-32编码）
+    :param text: 文本
+    :return: numpy uint32数组
+    """
+    # surrogatepass：密文中可能出现孤立代理项码点，需要原样保留
+    return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+
+def codes_to_text(codes):
+    """
+    将码点数组还原为文本
+    :param codes: numpy整数数组
+    :return: 文本
+    """
+    return codes.astype('<u4', copy=False).tobytes().decode('utf-32-le', 'surrogatepass')
+
+
+def _tile(values, length, start=0, dtype=None):
+    """
+    将按槽位排列的参数平铺到输入长度，第i个位置使用 values[(start + i) % len(values)]
+    start 也可以是逐元素的槽位下标数组（见 record_slots），此时第i个位置使用 values[start[i]]
+    """
+    if isinstance(start, np.ndarray):
+        return np.array(values, dtype=dtype or np.uint32)[start]
+    offset = start % len(values)
+    values = values[offset:] + values[:offset]
+    return np.resize(np.array(values, dtype=dtype or np.uint32), length)
+
+
+def transform_codes(codes, plan, encrypt=True, start=0, fix_zero=True):
+    """
+    对码点数组整体应用密钥变换
+    :param codes: numpy uint32码点数组
+    :param plan: key_transform.KeyPlan
+    :param encrypt: True为加密，False为解密
+    :param start: 数组首元素的全局位置
+    :param fix_zero: 是否将结果0映射为1
+    :return: 变换后的uint32码点数组
+    """
+    codes = codes.astype(np.uint32, copy=False)
+    length = len(codes)
+    add = _tile(plan.adds, length, start)
+    shift = _tile(plan.shifts, length, start)
+    xor = _tile(plan.xor_masks, length, start)
+
+    # 所有中间量都在uint32中计算，溢出只影响高位，与逐字符实现的 mod 65536 结果一致
+    if encrypt:
+        step1 = (codes * _tile(plan.mults, length, start) + add) & 0xFFFF
+        step2 = ((step1 << shift) | (step1 >> (16 - shift))) & 0xFFFF
+        result = step2 ^ xor
+    else:
+        step3_inv = codes ^ xor
+        step2_inv = ((step3_inv >> shift) | (step3_inv << (16 - shift))) & 0xFFFF
+        result = (_tile(plan.mult_inverses, length, start) * (step2_inv - add)) & 0xFFFF
+
+    # 与逐字符实现保持一致：结果为0时映射为1
+    if fix_zero:
+        result[result == 0] = 1
+    return result
+
+
+def apply_transform(text, plan, encrypt=True, start=0, fix_zero=True):
+    """
+    向量化版本的 apply_key_transform 核心循环
+    :param text: 要变换的文本
+    :param plan: key_transform.KeyPlan
+    :param encrypt: True为加密，False为解密
+    :param start: 文本首字符的全局位置
+    :param fix_zero: 是否将结果0映射为1
+    :return: 变换后的文本
+    """
+    return codes_to_text(transform_codes(text_to_codes(text), plan, encrypt, start, fix_zero))
+
+
+def transform_units(units, plan, encrypt=True, start=0):
+    """
+    向量化版本的 key_transform.transform_units
+    :param units: bytes类对象（uint8码元）或 array('H')
+    :return: 小端uint16字节串
+    """
+    dtype = np.uint16 if getattr(units, 'typecode', None) == 'H' else np.uint8
+    codes = np.frombuffer(units, dtype=dtype)
+    return transform_codes(codes, plan, encrypt, start, fix_zero=False).astype('<u2').tobytes()
+
+
+def record_slots(lengths, size):
+    """
+    计算多条记录拼接后每个位置的槽位下标，每条记录都从槽位0开始
+    :param lengths: 各记录长度
+    :param size: 槽位数
+    :return: numpy int64数组，可作为 start 参数传给各变换函数
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    origins = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return (np.arange(len(origins), dtype=np.int64) - origins) % size
+
+
+def _to_index(codes):
+    """标量值 -> 连续下标（int64）"""
+    index = codes.astype(np.int64)
+    index -= (index >= key_transform.SURROGATE_END) * key_transform.SURROGATE_SIZE
+    return index
+
+
+def _from_index(index):
+    """连续下标 -> 标量值"""
+    index += (index >= key_transform.SURROGATE_START) * key_transform.SURROGATE_SIZE
+    return index
+
+
+def transform_full_codes(codes, plan, encrypt=True, start=0):
+    """
+    对标量值数组整体应用全码位变换
+    :param codes: numpy整数数组（合法Unicode标量值）
+    :param plan: key_transform.KeyPlan
+    :param encrypt: True为加密，False为解密
+    :param start: 数组首元素的全局位置
+    :return: 变换后的int64标量值数组
+    """
+    full_range = key_transform.FULL_RANGE
+    bits = key_transform.FULL_LOW_BITS
+    low_mask = key_transform.FULL_LOW_MASK
+    index = _to_index(codes)
+    length = len(index)
+    mult, add, rot, mask, inv = (_tile(column, length, start, np.int64)
+                                 for column in zip(*plan.full_slots))
+
+    if encrypt:
+        index = (index * mult + add) % full_range
+        low = index & low_mask
+        low = ((low << rot) | (low >> (bits - rot))) & low_mask
+        index = (index & ~low_mask) | (low ^ mask)
+    else:
+        low = (index & low_mask) ^ mask
+        low = ((low >> rot) | (low << (bits - rot))) & low_mask
+        index = (index & ~low_mask) | low
+        index = (inv * (index - add)) % full_range
+
+    return _from_index(index)
+
+
+def apply_full_transform(text, plan, encrypt=True, start=0):
+    """
+    向量化版本的全码位变换，与 key_transform 中的逐字符实现结果一致
+    :param text: 要变换的文本（不含孤立代理项）
+    :param plan: key_transform.KeyPlan
+    :param encrypt: True为加密，False为解密
+    :param start: 文本首字符的全局位置
+    :return: 变换后的文本
+    """
+    return codes_to_text(transform_full_codes(text_to_codes(text), plan, encrypt, start))
+
+
+def shift_scalars(text, offset):
+    """
+    向量化版本的 key_transform.shift_scalars
+    """
+    index = (_to_index(text_to_codes(text)) + offset) % key_transform.FULL_RANGE
+    return codes_to_text(_from_index(index))
@@ -1,10 +1,19 @@
+from ui import startup  # 最先导入，作为启动计时起点
 from ui.floating_avatar import MainController
 from PyQt5.QtWidgets import QApplication
 import sys
 from PyQt5.QtCore import Qt, QPoint, QTimer, QRect
 
 if __name__ == '__main__':
+    startup.mark('imports')
     app = QApplication(sys.argv)
-    window = MainController()
+    startup.mark('qapplication')
+    # 快速启动：先显示头像，加解密面板和设置窗口在第一次使用时才创建
+    window = MainController(fast_start='--eager-panel' not in sys.argv)
     window.show()
-    sys.exit(app.exec_()) 
\ No newline at end of file
+    startup.mark('avatar_shown')
+    if startup.enabled():
+        startup.add_hook(startup.print_report)
+    # 事件循环开始处理后（头像已完成首次绘制）记录启动完成
+    QTimer.singleShot(0, startup.finish)
+    sys.exit(app.exec_())
\ No newline at end of file
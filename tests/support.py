@@ -0,0 +1,32 @@
+# 测试共用的辅助函数
+
+import random
+import string
+
+from crypto import key_transform
+
+
+def make_keys(count, first='abc12345', seed=2024):
+    """
+    生成确定性的合法测试密钥
+    :param count: 密钥数
+    :param first: 固定的第一个密钥（复现问题时使用的密钥）
+    :param seed: 随机种子
+    :return: 密钥列表
+    """
+    rng = random.Random(seed)
+    keys = [first]
+    chars = string.ascii_letters + string.digits
+    while len(keys) < count:
+        key = ''.join(rng.choice(chars) for _ in range(rng.randint(8, 32)))
+        if key_transform.validate_key(key)[0]:
+            keys.append(key)
+    return keys
+
+
+def available_engines():
+    """当前环境可用的密钥变换引擎"""
+    engines = ['python', 'table']
+    if key_transform.vectorized.is_available():
+        engines.append('numpy')
+    return engines
@@ -0,0 +1,67 @@
+# 合并位移内核的穷举验证
+# unicode_shift 使用密钥时把 +3 位移并入密钥变换的仿射加法常数，一次遍历完成加解密。
+# 这里对每个密钥的每个变换槽位穷举全部16位码点（及辅助平面边界），逐引擎验证合并内核
+# 与原来"先位移再变换/先变换再位移"的两步实现（benchmarks.fused_shift）结果完全一致，
+# 包括 0→1 映射和报错的情形；全码位模式对一个密钥穷举全部Unicode标量值。
+
+import pytest
+
+from benchmarks.fused_shift import KEY, decrypt_two_pass, encrypt_two_pass
+from crypto import key_transform, unicode_shift
+from tests.support import available_engines, make_keys
+
+# 辅助平面字符的抽样步长（默认模式下这些字符只有低16位参与变换）
+SUPPLEMENTARY_STEP = 4099
+
+
+def _raises(func, *args, **kwargs):
+    try:
+        func(*args, **kwargs)
+    except ValueError:
+        return True
+    return False
+
+
+@pytest.mark.parametrize('engine', available_engines())
+@pytest.mark.parametrize('key', make_keys(8, first=KEY))
+def test_fused_matches_two_pass(key, engine):
+    """默认模式：每个槽位上的全部65536个码点，加密和解密两个方向"""
+    size = key_transform.get_key_plan(key).size
+    # 每个码点重复size次，第k个副本恰好落在槽位k上
+    text = ''.join(chr(code) * size for code in range(65536))
+    supplementary = ''.join(chr(code) for code in range(0x10000, 0x10FFFD, SUPPLEMENTARY_STEP)) + '\U0010fffc'
+
+    # 加密：全部16位码点和辅助平面抽样
+    for sample in (text, supplementary):
+        assert unicode_shift.encrypt(sample, key, engine=engine) == encrypt_two_pass(sample, key, engine=engine)
+    # 加密：位移后超出 U+10FFFF 的字符两种实现都必须报错
+    for code in range(0x10FFFD, 0x110000):
+        for start in range(size):
+            assert _raises(unicode_shift.encrypt_at, chr(code), key, start, engine=engine), f"U+{code:04X}"
+            assert _raises(encrypt_two_pass, chr(code), key, engine=engine, start=start), f"U+{code:04X}"
+
+    # 解密：第一步变换结果小于3的位置在两步实现中会报错，逐个确认合并实现也报错，
+    # 再把这些位置替换为可正常解密的字符，整段比较其余位置
+    first = key_transform.decrypt_with_key(text, key, engine=engine)
+    bad = [i for i, c in enumerate(first) if ord(c) < unicode_shift.OFFSET]
+    for i in bad:
+        assert _raises(unicode_shift.decrypt_at, text[i], key, i, engine=engine), f"位置{i}"
+        assert _raises(decrypt_two_pass, text[i], key, engine=engine, start=i), f"位置{i}"
+    sample = list(text)
+    for i in bad:
+        sample[i] = unicode_shift.encrypt_at('a', key, i)
+    sample = ''.join(sample)
+    assert unicode_shift.decrypt(sample, key, engine=engine) == decrypt_two_pass(sample, key, engine=engine)
+
+
+@pytest.mark.parametrize('engine', available_engines())
+def test_fused_matches_two_pass_full_unicode(engine):
+    """全码位模式：每个槽位上的全部Unicode标量值"""
+    size = key_transform.get_key_plan(KEY).size
+    scalars = ''.join(chr(code) for code in range(0x110000)
+                      if not key_transform.SURROGATE_START <= code < key_transform.SURROGATE_END)
+    for k in range(size):
+        assert (unicode_shift.encrypt_at(scalars, KEY, k, engine=engine, full_unicode=True)
+                == encrypt_two_pass(scalars, KEY, engine, k, full_unicode=True)), f"槽位{k}"
+        assert (unicode_shift.decrypt_at(scalars, KEY, k, engine=engine, full_unicode=True)
+                == decrypt_two_pass(scalars, KEY, engine, k, full_unicode=True)), f"槽位{k}"
@@ -0,0 +1,131 @@
+# 内存映射加解密的验证
+# 映射文件的分块结果必须与一次性在内存中变换完全一致：UTF-16LE 等于 key_transform.transform_units，
+# UTF-32LE 等于全码位模式的 apply_key_transform。块大小取奇数时块边界会把代理项对
+# （4字节的UTF-16序列）拆在两块之间，取1时每个码元单独成块。
+# 另外验证各种组合的往返还原，以及"不带BOM的第一个码元被加密为 U+FEFF"时的处理。
+
+import random
+import sys
+from array import array
+
+import pytest
+
+from crypto import key_transform, mmap_codec, vectorized
+from tests.support import make_keys
+
+KEY = 'abc12345'
+BOM_CHAR = '\ufeff'
+
+# 含辅助平面字符（UTF-16中为代理项对）、中文和ASCII
+POOL = 'abc 123，。加密解密测试\U0001f600\U0001f680\U00010000\U0010fffd'
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def kernel(request, monkeypatch):
+    """分别用numpy内核和无numpy的回退实现运行"""
+    if request.param == 'numpy':
+        if not vectorized.is_available():
+            pytest.skip('需要numpy')
+    else:
+        monkeypatch.setattr(vectorized, 'is_available', lambda: False)
+    return request.param
+
+
+def make_text(length, seed=2024):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(POOL) for _ in range(length))
+
+
+def encoding(utf32):
+    return 'utf-32-le' if utf32 else 'utf-16-le'
+
+
+def in_memory(text, key, encrypt, utf32):
+    """一次性在内存中变换（不含BOM）"""
+    if utf32:
+        return key_transform.apply_key_transform(text, key, encrypt, full_unicode=True).encode('utf-32-le')
+    units = array('H')
+    units.frombytes(text.encode('utf-16-le', 'surrogatepass'))
+    if sys.byteorder != 'little':
+        units.byteswap()
+    return key_transform.transform_units(units, key, encrypt)
+
+
+def collision_char(key, utf32):
+    """第一个位置上加密结果恰好为 U+FEFF 的字符"""
+    if utf32:
+        return key_transform.apply_key_transform(BOM_CHAR, key, encrypt=False, full_unicode=True)
+    unit = key_transform.transform_units(array('H', [ord(BOM_CHAR)]), key, encrypt=False)
+    return unit.decode('utf-16-le', 'surrogatepass')
+
+
+@pytest.mark.parametrize('chunk_units', [1, 3, 977, mmap_codec.CHUNK_UNITS])
+@pytest.mark.parametrize('bom', [False, True])
+@pytest.mark.parametrize('utf32', [False, True])
+def test_matches_in_memory(tmp_path, kernel, utf32, bom, chunk_units):
+    text = make_text(3000)
+    prefix = BOM_CHAR.encode(encoding(utf32)) if bom else b''
+    path = tmp_path / 'plain.txt'
+    path.write_bytes(prefix + text.encode(encoding(utf32)))
+    cipher = prefix + in_memory(text, KEY, True, utf32)
+
+    output = tmp_path / 'cipher.txt'
+    mmap_codec.transform_file(str(path), KEY, True, str(output), utf32=utf32, chunk_units=chunk_units)
+    assert output.read_bytes() == cipher
+
+    # 原地改写与写入输出文件结果相同，解密同样与内存中的结果一致
+    mmap_codec.transform_file(str(path), KEY, True, utf32=utf32, chunk_units=chunk_units)
+    assert path.read_bytes() == cipher
+    mmap_codec.transform_file(str(path), KEY, False, utf32=utf32, chunk_units=chunk_units)
+    assert path.read_bytes() == prefix + text.encode(encoding(utf32))
+
+
+@pytest.mark.parametrize('key', make_keys(4))
+@pytest.mark.parametrize('utf32', [False, True])
+def test_roundtrip(tmp_path, kernel, key, utf32):
+    """带或不带BOM、保留或不保留BOM、原地或写入输出文件，都能精确还原"""
+    path = tmp_path / 'sample.txt'
+    collision = collision_char(key, utf32)
+    texts = [make_text(2000), BOM_CHAR + make_text(2000), BOM_CHAR + collision + make_text(100)]
+    if collision != BOM_CHAR:
+        texts.append(collision + make_text(100))
+    for text in texts:
+        data = text.encode(encoding(utf32), 'surrogatepass')
+        for keep_bom in (True, False):
+            if keep_bom and text[0] == collision != BOM_CHAR:
+                continue  # 见 test_bom_collision
+            for in_place in (True, False):
+                path.write_bytes(data)
+                cipher = None if in_place else str(tmp_path / 'sample.enc')
+                plain = None if in_place else str(tmp_path / 'sample.dec')
+                mmap_codec.transform_file(str(path), key, True, cipher, utf32=utf32, keep_bom=keep_bom,
+                                          chunk_units=977)
+                mmap_codec.transform_file(cipher or str(path), key, False, plain, utf32=utf32,
+                                          keep_bom=keep_bom, chunk_units=977)
+                with open(plain or path, 'rb') as f:
+                    assert f.read() == data, (keep_bom, in_place, hex(ord(text[0])))
+
+
+@pytest.mark.parametrize('key', make_keys(4))
+@pytest.mark.parametrize('utf32', [False, True])
+def test_bom_collision(tmp_path, key, utf32):
+    """不带BOM的第一个码元会被加密为BOM：保留BOM时报错且不改动文件"""
+    collision = collision_char(key, utf32)
+    if collision == BOM_CHAR:
+        pytest.skip('该密钥下BOM加密后仍是BOM')
+    data = (collision + make_text(100)).encode(encoding(utf32), 'surrogatepass')
+    path = tmp_path / 'sample.txt'
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        mmap_codec.transform_file(str(path), key, True, utf32=utf32, keep_bom=True)
+    assert path.read_bytes() == data
+    with pytest.raises(ValueError):
+        mmap_codec.transform_file(str(path), key, True, str(tmp_path / 'sample.enc'), utf32=utf32, keep_bom=True)
+
+
+@pytest.mark.parametrize('chunk_units', [0, -1])
+def test_rejects_chunk_units_below_one(tmp_path, chunk_units):
+    path = tmp_path / 'sample.txt'
+    path.write_bytes('abc'.encode('utf-16-le'))
+    with pytest.raises(ValueError):
+        mmap_codec.transform_file(str(path), KEY, True, chunk_units=chunk_units)
@@ -0,0 +1,59 @@
+# 剪贴板集成
+# 大结果不在复制时立即转换成 QString，而是放入 LazyTextMimeData，
+# 只有其他程序真正粘贴时才按需生成数据；面板和剪贴板共享同一个 Python 字符串，不产生额外副本
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QByteArray, QMimeData
+
+# 超过该长度（字符数）的文本延迟渲染
+LAZY_THRESHOLD = 100000
+
+_TEXT_FORMATS = ('text/plain', 'text/plain;charset=utf-8')
+
+class LazyTextMimeData(QMimeData):
+    """
+    延迟渲染的纯文本剪贴板数据，持有结果字符串的引用，粘贴时才转换
+    :param text: 文本
+    """
+
+    def __init__(self, text):
+        super().__init__()
+        self.buffer = text
+
+    def formats(self):
+        return list(_TEXT_FORMATS)
+
+    def hasFormat(self, mimetype):
+        return mimetype in _TEXT_FORMATS
+
+    def hasText(self):
+        return True
+
+    def retrieveData(self, mimetype, preferred_type):
+        if mimetype not in _TEXT_FORMATS:
+            return None
+        if mimetype == 'text/plain;charset=utf-8':
+            return QByteArray(self.buffer.encode('utf-8', 'surrogatepass'))
+        return self.buffer
+
+def set_text(text):
+    """
+    将文本放入剪贴板，大文本延迟渲染
+    :param text: 文本
+    """
+    clipboard = QApplication.clipboard()
+    if len(text) > LAZY_THRESHOLD:
+        clipboard.setMimeData(LazyTextMimeData(text))
+    else:
+        clipboard.setText(text)
+
+def get_text():
+    """
+    读取剪贴板文本；剪贴板内容由本程序延迟渲染时直接返回原字符串
+    :return: 文本
+    """
+    clipboard = QApplication.clipboard()
+    data = clipboard.mimeData()
+    if isinstance(data, LazyTextMimeData):
+        return data.buffer
+    return clipboard.text()
@@ -0,0 +1,197 @@
+# 配置存储
+# 设置保存在内存中，读取不访问磁盘；修改后经过短暂防抖，由后台线程合并写入
+# 写入时先写同目录临时文件再原子替换，任何时候都不会留下写了一半的 config.json
+# 通过文件的修改时间和大小发现外部修改，只在文件确实变化时才重新读取
+
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
+
+# 最后一次修改后等待多久再写盘（秒），期间的多次修改合并为一次写入
+WRITE_DELAY = 0.5
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def _signature(path):
+    """文件的 (修改时间, 大小)，不存在时返回None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _atomic_write_json(path, data):
+    """先写同目录临时文件并落盘，再原子替换目标文件（沿用原文件权限）"""
+    from crypto.batch import output_mode
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.config.', suffix='.tmp', dir=directory)
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, output_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class ConfigStore:
+    """
+    内存配置存储，防抖后在后台线程原子写盘
+    :param path: 配置文件路径
+    :param delay: 写盘防抖时间（秒）
+    """
+
+    def __init__(self, path=CONFIG_PATH, delay=WRITE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.last_error = None
+        self._data = {}
+        self._pending = {}       # 尚未写盘的修改，外部修改重新加载后会再次应用
+        self._signature = None
+        self._deadline = None    # 计划写盘的时间点，None表示没有待写内容
+        self._closed = False
+        self._writing = False
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._load()
+        self._writer = threading.Thread(target=self._write_loop, name='config-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _load(self):
+        """从磁盘读取配置（调用方持有锁或处于初始化阶段）"""
+        signature = _signature(self.path)
+        data = {}
+        if signature is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("配置文件内容不是JSON对象")
+            except (OSError, ValueError) as e:
+                logger.warning("读取配置文件 %s 失败: %s", self.path, e)
+                self.last_error = e
+                data = {}
+        data.update(self._pending)
+        self._data = data
+        self._signature = signature
+
+    def _refresh(self):
+        """文件被外部修改时重新读取（调用方持有锁）"""
+        if not self._writing and _signature(self.path) != self._signature:
+            self._load()
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._refresh()
+            return self._data.get(key, default)
+
+    def snapshot(self):
+        """
+        当前配置的副本
+        :return: dict
+        """
+        with self._lock:
+            self._refresh()
+            return dict(self._data)
+
+    def update(self, values=None, **kwargs):
+        """
+        修改配置并安排写盘，立即返回
+        :param values: 要修改的键值字典
+        """
+        values = dict(values or {}, **kwargs)
+        with self._lock:
+            self._refresh()
+            changed = {k: v for k, v in values.items() if self._data.get(k, _MISSING) != v}
+            if not changed:
+                return
+            self._data.update(changed)
+            self._pending.update(changed)
+            self._deadline = time.monotonic() + self.delay
+            self._wakeup.notify()
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def flush(self):
+        """立即写入尚未保存的修改（同步）"""
+        self._write()
+
+    def close(self):
+        """写入剩余修改并停止后台线程"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join(timeout=5)
+        self._write()
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                if self._deadline is None:
+                    self._wakeup.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+            self._write()
+
+    def _write(self):
+        """
+        原子写盘：在锁内取快照，在锁外写文件，界面线程的读写不会等待磁盘
+        """
+        with self._io_lock:
+            with self._lock:
+                if self._deadline is None:
+                    return
+                self._deadline = None
+                # 写盘前合并期间发生的外部修改
+                self._refresh()
+                data = dict(self._data)
+                written = dict(self._pending)
+                self._writing = True
+            try:
+                _atomic_write_json(self.path, data)
+                error = None
+            except OSError as e:
+                logger.warning("写入配置文件 %s 失败: %s", self.path, e)
+                error = e
+            with self._lock:
+                self._writing = False
+                self.last_error = error
+                if error is None:
+                    self._signature = _signature(self.path)
+                    # 写盘期间又被修改的键仍保留在待写列表中
+                    for k, v in written.items():
+                        if self._pending.get(k, _MISSING) == v:
+                            del self._pending[k]
+
+_store = None
+
+def get_config_store():
+    """
+    应用共用的配置存储（首次调用时创建）
+    :return: ConfigStore
+    """
+    global _store
+    if _store is None:
+        _store = ConfigStore()
+    return _store
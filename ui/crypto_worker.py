@@ -0,0 +1,76 @@
+# 后台加解密任务
+# 在QThreadPool中按块执行加解密，通过信号向界面线程汇报进度，支持中途取消
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+# 每块处理的字符数，决定进度刷新和取消响应的粒度
+CHUNK_SIZE = 65536
+
+class TaskCancelled(Exception):
+    """任务被取消"""
+
+class WorkerSignals(QObject):
+    # 参数均以任务编号开头，界面据此丢弃过期任务的回调
+    progress = pyqtSignal(int, int)        # 任务编号, 进度百分比
+    finished = pyqtSignal(int, object)     # 任务编号, 结果文本（object避免额外的QString拷贝）
+    failed = pyqtSignal(int, str)          # 任务编号, 错误信息
+    cancelled = pyqtSignal(int)            # 任务编号
+
+class CryptoTask(QRunnable):
+    """
+    分块加解密任务
+    :param job_id: 任务编号
+    :param codec: 编解码模块（需提供 encrypt_stream/decrypt_stream）
+    :param encrypt: True为加密，False为解密
+    :param text: 输入文本
+    :param key: 可选密钥
+    :param full_unicode: 是否使用全码位模式
+    """
+
+    def __init__(self, job_id, codec, encrypt, text, key=None, chunk_size=CHUNK_SIZE, full_unicode=False):
+        super().__init__()
+        self.job_id = job_id
+        self.codec = codec
+        self.encrypt = encrypt
+        self.text = text
+        self.key = key
+        self.chunk_size = chunk_size
+        self.full_unicode = full_unicode
+        self.signals = WorkerSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        """请求取消，任务在处理下一块前退出"""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def _chunks(self):
+        """按块切分输入，同时汇报进度并检查取消标记"""
+        total = len(self.text)
+        last_percent = -1
+        for start in range(0, total, self.chunk_size):
+            if self._cancelled:
+                raise TaskCancelled()
+            percent = start * 100 // total
+            if percent != last_percent:
+                self.signals.progress.emit(self.job_id, percent)
+                last_percent = percent
+            yield self.text[start:start + self.chunk_size]
+
+    def run(self):
+        try:
+            stream = self.codec.encrypt_stream if self.encrypt else self.codec.decrypt_stream
+            result = ''.join(stream(self._chunks(), self.key, full_unicode=self.full_unicode))
+            if self._cancelled:
+                raise TaskCancelled()
+            self.signals.progress.emit(self.job_id, 100)
+            self.signals.finished.emit(self.job_id, result)
+        except TaskCancelled:
+            self.signals.cancelled.emit(self.job_id)
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+        finally:
+            # 释放输入文本，避免任务对象被线程池持有时占用内存
+            self.text = ''
@@ -1,29 +1,26 @@
 import sys
-from PyQt5.QtWidgets import QWidget, QApplication, QMenu, QAction, QVBoxLayout, QComboBox, QTextEdit, QPushButton, QHBoxLayout, QGraphicsDropShadowEffect, QLabel
-from PyQt5.QtGui import QPainter, QPixmap, QRegion, QCursor, QColor, QFont, QGuiApplication
-from PyQt5.QtCore import Qt, QPoint, QTimer, QRect
+from PyQt5.QtWidgets import QWidget, QApplication, QMenu, QAction, QVBoxLayout, QComboBox, QTextEdit, QPlainTextEdit, QPushButton, QHBoxLayout, QGraphicsDropShadowEffect, QLabel, QProgressBar, QFileDialog, QMessageBox, QToolTip
+from PyQt5.QtGui import QPainter, QPixmap, QRegion, QCursor, QColor, QFont, QGuiApplication, QTextCursor
+from PyQt5.QtCore import Qt, QPoint, QTimer, QRect, QThreadPool
 import os
-import json
-from crypto import unicode_shift, base64_codec
-from .settings_window import SettingsWindow
+from crypto import registry
+from .config_store import get_config_store
+from .crypto_worker import CryptoTask
+from .result_viewer import ResultViewer
+from . import clipboard
 
-CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
+# 面板高度：不显示/显示实时预览
+PANEL_HEIGHT = 320
+PANEL_HEIGHT_PREVIEW = 400
 
-def load_config():
-    if os.path.exists(CONFIG_PATH):
-        try:
-            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+# 结果超过该长度（字符数）时改用大文本查看器显示，不再放入 QTextEdit 排版
+LARGE_RESULT_THRESHOLD = 100000
+
+# 一次编辑需要更新的预览长度超过该值时延后合并刷新，保持按键响应
+PREVIEW_SYNC_LIMIT = 4096
 
-def save_config(data):
-    try:
-        with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(data, f)
-    except Exception:
-        pass
+# 非逐位置算法（如Base64）的预览每次都要重新加密全文，只在文本不超过该长度时显示
+PREVIEW_FULL_LIMIT = 20000
 
 class PopupPanel(QWidget):
     def __init__(self, parent=None):
@@ -33,14 +30,16 @@ class PopupPanel(QWidget):
             self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Window)
             self.setAttribute(Qt.WA_TranslucentBackground)
         self.setAttribute(Qt.WA_InputMethodEnabled, True)
-        self.setFixedSize(320, 320)  # 增加高度以容纳设置按钮
+        self.setFixedSize(320, PANEL_HEIGHT)  # 增加高度以容纳设置按钮
         
         # 初始化设置
         self.settings = {
             'key_enabled': False,
             'key': '',
             'auto_copy': False,
-            'save_key': True
+            'save_key': True,
+            'full_unicode': False,
+            'live_preview': False
         }
         self.settings_window = None
         shadow = QGraphicsDropShadowEffect(self)
@@ -48,13 +47,10 @@ class PopupPanel(QWidget):
         shadow.setColor(QColor(0,0,0,120))
         shadow.setOffset(0, 6)
         self.setGraphicsEffect(shadow)
-        self.algorithms = [
-            ('Unicode复合变换（支持中文）', '基于密钥的多步骤数学变换：\n1. 密钥MD5哈希生成变换参数（乘法因子、偏移量、位移、XOR掩码）\n2. 仿射变换：(字符码×乘法因子+偏移) mod 65536\n3. 循环位移：16位循环左移操作\n4. XOR变换：与密钥衍生掩码异或\n解密需相同密钥进行严格逆向运算。'),
-            ('Base64密钥增强（支持中文）', '先进行Unicode复合变换，再Base64编码的双重加密：\n1. 使用密钥对文本进行复合数学变换\n2. 将变换结果进行Base64编码\n解密时需先Base64解码，再用相同密钥逆向变换。\n提供更高的安全性和复杂度。')
-        ]
+        self.algorithms = registry.list_codecs()
         self.combo = QComboBox(self)
-        for name, _ in self.algorithms:
-            self.combo.addItem(name)
+        for info in self.algorithms:
+            self.combo.addItem(info.title, info.name)
         self.decrypt_hint = QLabel(self)
         self.decrypt_hint.setStyleSheet('color:#bbb;font-size:12px;')
         self.update_decrypt_hint()
@@ -62,11 +58,45 @@ class PopupPanel(QWidget):
         self.text_edit = QTextEdit(self)
         self.text_edit.setPlaceholderText('请输入或粘贴文本...')
         self.text_edit.setFont(QFont('微软雅黑', 11))
+        # 大文本结果：完整结果保存在查看器的缓冲区中，只绘制可见行
+        self.result_viewer = ResultViewer(self)
+        self.result_viewer.setFont(QFont('微软雅黑', 11))
+        self.result_viewer.hide()
+        self.large_result = False
+        # 最近一次结果（与输入框内容一致时复制直接使用它，不再调用 toPlainText）
+        self.result_buffer = None
+        self.result_revision = -1
+        # 实时预览：只读显示当前文本的密文
+        self.preview = QPlainTextEdit(self)
+        self.preview.setReadOnly(True)
+        self.preview.setFixedHeight(72)
+        self.preview.setPlaceholderText('密文预览')
+        self.preview.setToolTip('实时预览（不可显示的字符以 \ufffd 代替，复制请使用加密结果）')
+        self.preview.hide()
+        self.live_cipher = None      # IncrementalCipher，仅逐位置算法使用
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(150)
+        self.preview_timer.timeout.connect(self.refresh_preview)
+        self.preview_stale_from = None   # 预览中从该位置起尚未更新（延后合并刷新）
+        self.preview_sync_timer = QTimer(self)
+        self.preview_sync_timer.setSingleShot(True)
+        self.preview_sync_timer.setInterval(150)
+        self.preview_sync_timer.timeout.connect(self.sync_preview_tail)
         self.btn_encrypt = QPushButton('加密', self)
         self.btn_decrypt = QPushButton('解密', self)
         self.btn_copy = QPushButton('复制', self)
         self.btn_clear = QPushButton('清空', self)
         self.btn_settings = QPushButton('设置', self)
+        self.btn_cancel = QPushButton('取消', self)
+        self.btn_save = QPushButton('保存到文件', self)
+        self.btn_save.hide()
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setFixedHeight(8)
+        self.progress_bar.hide()
+        self.btn_cancel.hide()
         self.decrypt_detail = QLabel(self)
         self.decrypt_detail.setStyleSheet('color:#888;font-size:12px;')
         self.decrypt_detail.setWordWrap(True)
@@ -78,6 +108,8 @@ class PopupPanel(QWidget):
         vbox.addWidget(self.combo)
         vbox.addWidget(self.decrypt_hint)
         vbox.addWidget(self.text_edit)
+        vbox.addWidget(self.result_viewer)
+        vbox.addWidget(self.preview)
         # 第一行按钮
         hbox1 = QHBoxLayout()
         hbox1.addWidget(self.btn_encrypt)
@@ -86,10 +118,17 @@ class PopupPanel(QWidget):
         hbox1.addWidget(self.btn_clear)
         vbox.addLayout(hbox1)
         
+        # 进度条（仅在后台任务运行时显示）
+        hbox_progress = QHBoxLayout()
+        hbox_progress.addWidget(self.progress_bar)
+        hbox_progress.addWidget(self.btn_cancel)
+        vbox.addLayout(hbox_progress)
+        
         # 第二行按钮（设置）
         hbox2 = QHBoxLayout()
         hbox2.addStretch()
         hbox2.addWidget(self.btn_settings)
+        hbox2.addWidget(self.btn_save)
         hbox2.addStretch()
         vbox.addLayout(hbox2)
         vbox.addWidget(self.decrypt_detail)
@@ -101,11 +140,27 @@ class PopupPanel(QWidget):
         self.btn_copy.clicked.connect(self.copy_text)
         self.btn_clear.clicked.connect(self.clear_text)
         self.btn_settings.clicked.connect(self.open_settings)
+        self.btn_save.clicked.connect(self.save_result)
+        self.result_viewer.copy_requested.connect(self.copy_text)
+        self.result_viewer.save_requested.connect(self.save_result)
+        self.btn_cancel.clicked.connect(self.cancel_task)
         self.combo.currentIndexChanged.connect(self.update_decrypt_detail)
         self.text_edit.textChanged.connect(self.update_decrypt_detail)
+        self.text_edit.textChanged.connect(self.on_text_changed)
+        self.text_edit.document().contentsChange.connect(self.on_contents_change)
+        self.combo.currentIndexChanged.connect(self.schedule_preview_refresh)
+        self.combo.currentIndexChanged.connect(self.on_algorithm_changed)
+        
+        # 后台加解密：单线程池保证任务按顺序执行
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.current_task = None
+        self.task_counter = 0
+        self.text_revision = 0  # 文本每次变化时递增，用于判断结果是否已过期
         
         # 加载设置
         self.load_settings_from_config()
+        self.apply_preview_setting()
 
     def ensure_input_focus(self):
         try:
@@ -125,9 +180,14 @@ class PopupPanel(QWidget):
     def update_decrypt_hint(self):
         self.decrypt_hint.setText('解密算法：' + self.combo.currentText())
 
+    def current_codec_info(self):
+        return registry.get_codec_info(self.combo.currentData())
+
+    def on_algorithm_changed(self):
+        get_config_store().set('algorithm', self.combo.currentData())
+
     def update_decrypt_detail(self):
-        idx = self.combo.currentIndex()
-        _, detail = self.algorithms[idx]
+        detail = self.current_codec_info().description
         
         # 添加密钥信息
         key_info = ""
@@ -154,62 +214,265 @@ class PopupPanel(QWidget):
         painter.setPen(Qt.NoPen)
         painter.drawRoundedRect(0, 0, self.width(), self.height(), self.radius, self.radius)
 
-    def encrypt_text(self):
+    def on_text_changed(self):
+        self.text_revision += 1
+
+    def apply_preview_setting(self):
+        """根据设置显示或隐藏实时预览"""
+        enabled = self.settings.get('live_preview', False)
+        self.preview.setVisible(enabled)
+        self.setFixedSize(320, PANEL_HEIGHT_PREVIEW if enabled else PANEL_HEIGHT)
+        parent = self.parentWidget()
+        if parent is not None and hasattr(parent, 'update_layout'):
+            parent.update_layout()
+        self.live_cipher = None
+        if enabled:
+            self.refresh_preview()
+        else:
+            self.preview_timer.stop()
+            self.preview_sync_timer.stop()
+            self.preview_stale_from = None
+            self.preview.clear()
+
+    def schedule_preview_refresh(self):
+        """稍后整体刷新预览（连续触发时只刷新一次）"""
+        self.live_cipher = None
+        if self.settings.get('live_preview', False):
+            self.preview_timer.start()
+
+    def refresh_preview(self):
+        """重新加密全文并刷新预览"""
+        self.preview_timer.stop()
+        self.preview_sync_timer.stop()
+        self.preview_stale_from = None
+        self.live_cipher = None
+        if self.large_result:
+            self.preview.setPlainText('结果较长，已切换到大文本查看模式')
+            return
         text = self.text_edit.toPlainText()
-        idx = self.combo.currentIndex()
+        info = self.current_codec_info()
+        key = self.settings.get('key', '') if self.settings.get('key_enabled', False) else None
+        full_unicode = self.settings.get('full_unicode', False)
+        from crypto.incremental import IncrementalCipher, display_safe
         try:
-            # 获取密钥
-            key = self.settings.get('key', '') if self.settings.get('key_enabled', False) else None
-            
-            if idx == 0:
-                result = unicode_shift.encrypt(text, key)
-            elif idx == 1:
-                result = base64_codec.encrypt(text, key)
+            if info.has_flag(registry.FLAG_POSITION_LOCAL):
+                cipher = IncrementalCipher(info.name, key, full_unicode)
+                cipher.reset(text)
+                # 含辅助平面字符时文档位置（UTF-16码元）与字符下标不一致，每次编辑都整体刷新
+                if not text or max(text) <= '\uffff':
+                    self.live_cipher = cipher
+                display = display_safe(cipher.cipher, text)
+            elif len(text) <= PREVIEW_FULL_LIMIT:
+                display = display_safe(info.codec.encrypt(text, key, full_unicode=full_unicode))
             else:
-                result = text
-            
-            self.text_edit.setPlainText(result)
-            
-            # 自动复制到剪贴板
-            if self.settings.get('auto_copy', False):
-                QApplication.clipboard().setText(result)
-                
+                display = '文本较长，请点击"加密"查看结果'
         except Exception as e:
-            self.text_edit.setPlainText(f'加密出错：{e}')
+            display = f"加密出错：{e}"
+        self.preview.setPlainText(display)
 
-    def decrypt_text(self):
-        text = self.text_edit.toPlainText()
-        idx = self.combo.currentIndex()
+    def replace_preview(self, start, end, new_end):
+        """用当前密文的 [start, new_end) 替换预览中的 [start, end)"""
+        from crypto.incremental import display_safe
+        cipher = self.live_cipher
+        cursor = QTextCursor(self.preview.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(display_safe(cipher.cipher_range(start, new_end), cipher.plain_range(start, new_end)))
+
+    def sync_preview_tail(self):
+        """把预览中过期的尾部一次性更新为当前密文"""
+        if self.preview_stale_from is None or self.live_cipher is None:
+            return
+        start, self.preview_stale_from = self.preview_stale_from, None
+        self.replace_preview(start, self.preview.document().characterCount() - 1, len(self.live_cipher))
+
+    def on_contents_change(self, position, removed, added):
+        """
+        文档内容变化：逐位置算法只重新加密变化的区间并拼接进缓存的密文
+        编辑点之后的密文因槽位移动而整体变化时，较长的尾部延后合并刷新，每次按键的耗时与文本长度无关
+        """
+        if not self.settings.get('live_preview', False):
+            return
+        cipher = self.live_cipher
+        document = self.text_edit.document()
+        # 整体替换文档等情况下Qt报告的区间可能包含末尾段落符，与缓存对不上时整体刷新
+        if cipher is None or position + removed > len(cipher) \
+                or len(cipher) - removed + added != document.characterCount() - 1 \
+                or (self.preview_stale_from is None
+                    and len(cipher) != self.preview.document().characterCount() - 1):
+            self.schedule_preview_refresh()
+            return
+        cursor = QTextCursor(document)
+        cursor.setPosition(position)
+        cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+        # selectedText 以 U+2029 表示换行，toPlainText 会把不换行空格转为普通空格，这里保持一致
+        text = cursor.selectedText().replace('\u2029', '\n').replace('\xa0', ' ')
+        if text and max(text) > '\uffff':
+            self.schedule_preview_refresh()
+            return
         try:
-            # 获取密钥
-            key = self.settings.get('key', '') if self.settings.get('key_enabled', False) else None
-            
-            if idx == 0:
-                result = unicode_shift.decrypt(text, key)
-            elif idx == 1:
-                result = base64_codec.decrypt(text, key)
+            start, end, new_end = cipher.splice(position, removed, text)
+        except Exception:
+            self.schedule_preview_refresh()
+            return
+        
+        stale = self.preview_stale_from
+        if stale is not None:
+            # 预览从 stale 起已过期：之后的编辑等尾部刷新时一并处理
+            if start >= stale:
+                return
+            if end <= stale and new_end - start == len(text):
+                # 只有编辑区间本身变化，过期起点随之移动
+                self.replace_preview(start, end, new_end)
+                self.preview_stale_from = stale + new_end - end
             else:
-                result = text
-            
+                self.mark_preview_stale(start)
+            return
+        if max(end, new_end) - start > PREVIEW_SYNC_LIMIT:
+            self.mark_preview_stale(start)
+        else:
+            self.replace_preview(start, end, new_end)
+
+    def mark_preview_stale(self, start):
+        """预览从 start 起过期，稍后合并刷新"""
+        if self.preview_stale_from is None or start < self.preview_stale_from:
+            self.preview_stale_from = start
+        self.preview_sync_timer.start()
+
+    def encrypt_text(self):
+        self.start_task(True)
+
+    def decrypt_text(self):
+        self.start_task(False)
+
+    def start_task(self, encrypt):
+        """在后台线程中执行加密/解密"""
+        text = self.current_text()
+        codec = self.current_codec_info().codec
+        
+        # 获取密钥
+        key = self.settings.get('key', '') if self.settings.get('key_enabled', False) else None
+        
+        # 新任务开始时取消尚未完成的旧任务
+        self.cancel_task()
+        self.task_counter += 1
+        task = CryptoTask(self.task_counter, codec, encrypt, text, key,
+                          full_unicode=self.settings.get('full_unicode', False))
+        task.signals.progress.connect(self.on_task_progress)
+        task.signals.finished.connect(self.on_task_finished)
+        task.signals.failed.connect(self.on_task_failed)
+        task.signals.cancelled.connect(self.on_task_cancelled)
+        self.current_task = task
+        self.task_revision = self.text_revision
+        
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.btn_cancel.show()
+        self.thread_pool.start(task)
+
+    def cancel_task(self):
+        """取消当前后台任务"""
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.current_task = None
+        self.progress_bar.hide()
+        self.btn_cancel.hide()
+
+    def is_current_task(self, job_id):
+        return self.current_task is not None and self.current_task.job_id == job_id
+
+    def on_task_progress(self, job_id, percent):
+        if self.is_current_task(job_id):
+            self.progress_bar.setValue(percent)
+
+    def on_task_finished(self, job_id, result):
+        if not self.is_current_task(job_id):
+            return
+        self.cancel_task()
+        
+        # 任务运行期间文本已被修改，丢弃结果
+        if self.task_revision != self.text_revision:
+            return
+        
+        self.set_result(result)
+        
+        # 自动复制到剪贴板
+        if self.settings.get('auto_copy', False):
+            clipboard.set_text(result)
+
+    def on_task_failed(self, job_id, error):
+        if not self.is_current_task(job_id):
+            return
+        encrypt = self.current_task.encrypt
+        self.cancel_task()
+        if self.task_revision != self.text_revision:
+            return
+        self.set_result(f"{'加密' if encrypt else '解密'}出错：{error}")
+
+    def on_task_cancelled(self, job_id):
+        if self.is_current_task(job_id):
+            self.cancel_task()
+
+    def current_text(self):
+        """当前内容：大文本模式下为查看器中的完整结果，否则为输入框文本"""
+        if self.large_result:
+            return self.result_viewer.text()
+        if self.result_buffer is not None and self.result_revision == self.text_revision:
+            return self.result_buffer
+        return self.text_edit.toPlainText()
+
+    def set_result(self, result):
+        """显示结果，超过 LARGE_RESULT_THRESHOLD 时切换到大文本查看器"""
+        if len(result) <= LARGE_RESULT_THRESHOLD:
+            self.leave_large_result()
             self.text_edit.setPlainText(result)
-            
-            # 自动复制到剪贴板
-            if self.settings.get('auto_copy', False):
-                QApplication.clipboard().setText(result)
-                
-        except Exception as e:
-            self.text_edit.setPlainText(f'解密出错：{e}')
+            self.result_buffer = result
+            self.result_revision = self.text_revision
+            return
+        self.large_result = True
+        self.result_viewer.set_text(result)
+        self.text_edit.hide()
+        self.result_viewer.show()
+        self.btn_save.show()
+        # 释放输入框中的原文及其排版占用的内存
+        self.text_edit.clear()
+        self.result_buffer = None
+
+    def leave_large_result(self):
+        """退出大文本模式，恢复可编辑的输入框"""
+        if not self.large_result:
+            return
+        self.large_result = False
+        self.result_viewer.clear()
+        self.result_viewer.hide()
+        self.btn_save.hide()
+        self.text_edit.show()
+
+    def save_result(self):
+        """将当前内容保存为UTF-8文本文件"""
+        path, _ = QFileDialog.getSaveFileName(self, '保存到文件', 'result.txt', '文本文件 (*.txt);;所有文件 (*)')
+        if not path:
+            return
+        from crypto.batch import TEXT_OPTIONS
+        try:
+            with open(path, 'w', **TEXT_OPTIONS) as f:
+                f.write(self.current_text())
+        except OSError as e:
+            QMessageBox.warning(self, '保存失败', f'无法写入文件：\n{e}')
 
     def copy_text(self):
-        text = self.text_edit.toPlainText()
-        QApplication.clipboard().setText(text)
+        clipboard.set_text(self.current_text())
 
     def clear_text(self):
+        self.result_buffer = None
+        self.leave_large_result()
         self.text_edit.clear()
     
     def open_settings(self):
         """打开设置窗口"""
         if self.settings_window is None:
+            # 设置窗口（含样式表和密钥工具）在第一次打开时才导入和创建
+            from .settings_window import SettingsWindow
             self.settings_window = SettingsWindow(self, self.settings)
             self.settings_window.settings_saved.connect(self.on_settings_saved)
         
@@ -223,20 +486,28 @@ class PopupPanel(QWidget):
         self.settings.update(new_settings)
         self.save_settings_to_config()
         self.update_decrypt_detail()  # 更新解密说明
+        self.apply_preview_setting()
     
     def load_settings_from_config(self):
         """从配置文件加载设置"""
-        config = load_config()
+        config = get_config_store().snapshot()
         
         # 加载密钥设置
         self.settings['key_enabled'] = config.get('key_enabled', False)
         self.settings['key'] = config.get('key', '')
         self.settings['auto_copy'] = config.get('auto_copy', False)
         self.settings['save_key'] = config.get('save_key', True)
+        self.settings['full_unicode'] = config.get('full_unicode', False)
+        self.settings['live_preview'] = config.get('live_preview', False)
+        
+        # 恢复上次选择的算法
+        index = self.combo.findData(config.get('algorithm'))
+        if index >= 0:
+            self.combo.setCurrentIndex(index)
     
     def save_settings_to_config(self):
-        """保存设置到配置文件"""
-        config = load_config()
+        """保存设置到配置文件（后台防抖写盘，不阻塞界面）"""
+        config = {}
         
         # 只有在用户选择保存密钥时才保存
         if self.settings.get('save_key', True):
@@ -245,8 +516,10 @@ class PopupPanel(QWidget):
         
         config['auto_copy'] = self.settings.get('auto_copy', False)
         config['save_key'] = self.settings.get('save_key', True)
+        config['full_unicode'] = self.settings.get('full_unicode', False)
+        config['live_preview'] = self.settings.get('live_preview', False)
         
-        save_config(config)
+        get_config_store().update(config)
 
 class AvatarWidget(QWidget):
     def __init__(self, parent=None):
@@ -269,7 +542,12 @@ class AvatarWidget(QWidget):
 
 
 class MainController(QWidget):
-    def __init__(self):
+    """
+    悬浮头像主窗口
+    :param fast_start: True时先只显示头像，弹出面板在第一次点击时才创建
+    """
+
+    def __init__(self, fast_start=True):
         super().__init__()
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
@@ -278,9 +556,15 @@ class MainController(QWidget):
         # 设置初始尺寸避免分层窗口问题
         self.resize(64, 64)
 
-        self.panel = PopupPanel(self)
+        self.panel = None
         self.avatar = AvatarWidget(self)
-        self.panel.hide()
+        if not fast_start:
+            self.ensure_panel()
+
+        # 右键菜单“加密/解密剪贴板”使用的后台线程池，第一次使用时创建
+        self.clipboard_pool = None
+        self.clipboard_task = None
+        self.clipboard_counter = 0
 
         self.drag_offset = QPoint()
         self.mouse_press_pos = None
@@ -293,6 +577,16 @@ class MainController(QWidget):
         self.update_layout()
         self.restore_or_center()
     
+    def ensure_panel(self):
+        """创建弹出面板（只创建一次）"""
+        if self.panel is None:
+            self.panel = PopupPanel(self)
+            self.panel.hide()
+        return self.panel
+
+    def is_panel_visible(self):
+        return self.panel is not None and self.panel.isVisible()
+
     def paintEvent(self, event):
         # 确保绘制区域不超出窗口边界
         painter = QPainter(self)
@@ -308,8 +602,7 @@ class MainController(QWidget):
             self.resize(max(64, self.width()), max(64, self.height()))
 
     def restore_or_center(self):
-        config = load_config()
-        pos = config.get('window_pos')
+        pos = get_config_store().get('window_pos')
         screen_rect = QApplication.primaryScreen().geometry()
         if pos and isinstance(pos, list) and len(pos) == 2:
             self.move(QPoint(pos[0], pos[1]))
@@ -320,7 +613,7 @@ class MainController(QWidget):
         self.resize(self.avatar.size())
 
     def update_layout(self):
-        if self.panel.isVisible():
+        if self.is_panel_visible():
             # 确保面板尺寸有效
             panel_width = max(320, self.panel.width())
             panel_height = max(320, self.panel.height())
@@ -363,16 +656,19 @@ class MainController(QWidget):
             moved_distance = (event.globalPos() - self.mouse_press_pos).manhattanLength()
             if moved_distance <= self.click_threshold:
                 self.toggle_panel()
+            else:
+                # 拖动结束即记录位置，写盘由配置存储在后台合并完成
+                get_config_store().set('window_pos', [self.x(), self.y()])
             self.mouse_press_pos = None
             event.accept()
 
     def toggle_panel(self):
         # 统一保持头像的全局位置不变
         avatar_global_before = self.mapToGlobal(self.avatar.pos())
-        if self.panel.isVisible():
+        if self.is_panel_visible():
             self.panel.hide()
         else:
-            self.panel.show()
+            self.ensure_panel().show()
         self.update_layout()
         avatar_global_after = self.mapToGlobal(self.avatar.pos())
         self.move(self.pos() + (avatar_global_before - avatar_global_after))
@@ -382,14 +678,70 @@ class MainController(QWidget):
     def show_context_menu(self, pos):
         if self.avatar.geometry().contains(pos):
             menu = QMenu(self)
+            encrypt_action = QAction('加密剪贴板', self)
+            encrypt_action.triggered.connect(lambda: self.transform_clipboard(True))
+            menu.addAction(encrypt_action)
+            decrypt_action = QAction('解密剪贴板', self)
+            decrypt_action.triggered.connect(lambda: self.transform_clipboard(False))
+            menu.addAction(decrypt_action)
+            menu.addSeparator()
             quit_action = QAction('退出', self)
             quit_action.triggered.connect(QApplication.instance().quit)
             menu.addAction(quit_action)
             menu.exec_(self.mapToGlobal(pos))
 
+    def crypto_settings(self):
+        """
+        当前的算法和密钥设置；面板尚未创建时直接读取配置
+        :return: (CodecInfo, 密钥或None, 是否全码位模式)
+        """
+        if self.panel is not None:
+            settings = self.panel.settings
+            info = self.panel.current_codec_info()
+        else:
+            settings = get_config_store().snapshot()
+            try:
+                info = registry.get_codec_info(settings.get('algorithm'))
+            except ValueError:
+                info = registry.list_codecs()[0]
+        key = settings.get('key', '') if settings.get('key_enabled', False) else None
+        return info, key or None, settings.get('full_unicode', False)
+
+    def transform_clipboard(self, encrypt):
+        """在后台加密/解密剪贴板中的文本并写回剪贴板，不打开面板"""
+        text = clipboard.get_text()
+        action = '加密' if encrypt else '解密'
+        if not text:
+            QToolTip.showText(QCursor.pos(), '剪贴板中没有文本')
+            return
+        info, key, full_unicode = self.crypto_settings()
+        if self.clipboard_pool is None:
+            self.clipboard_pool = QThreadPool(self)
+            self.clipboard_pool.setMaxThreadCount(1)
+        if self.clipboard_task is not None:
+            self.clipboard_task.cancel()
+        self.clipboard_counter += 1
+        task = CryptoTask(self.clipboard_counter, info.codec, encrypt, text, key, full_unicode=full_unicode)
+        
+        def finished(job_id, result):
+            if job_id == self.clipboard_counter:
+                self.clipboard_task = None
+                clipboard.set_text(result)
+                QToolTip.showText(QCursor.pos(), f'剪贴板已{action}')
+        
+        def failed(job_id, error):
+            if job_id == self.clipboard_counter:
+                self.clipboard_task = None
+                QToolTip.showText(QCursor.pos(), f'{action}剪贴板出错：{error}')
+        
+        task.signals.finished.connect(finished)
+        task.signals.failed.connect(failed)
+        self.clipboard_task = task
+        self.clipboard_pool.start(task)
+
     def closeEvent(self, event):
         pos = self.pos()
-        config = load_config()
-        config['window_pos'] = [pos.x(), pos.y()]
-        save_config(config)
+        store = get_config_store()
+        store.set('window_pos', [pos.x(), pos.y()])
+        store.flush()
         super().closeEvent(event)
\ No newline at end of file
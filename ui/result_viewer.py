@@ -0,0 +1,110 @@
+# 大文本结果查看器
+# 完整结果保存在Python字符串中，控件只绘制当前可见的几行，不做整段排版，
+# 几MB的密文也能立即显示、滚动；复制和保存直接使用原始字符串
+
+import bisect
+import re
+
+from PyQt5.QtWidgets import QAbstractScrollArea, QMenu
+from PyQt5.QtGui import QPainter, QFontMetrics
+from PyQt5.QtCore import Qt, pyqtSignal
+
+_NEWLINE_RE = re.compile('\n')
+
+class ResultViewer(QAbstractScrollArea):
+    """
+    只读虚拟化文本查看器：按换行分段，再按控件宽度折行，只绘制可见行
+    """
+    # 右键菜单请求的操作
+    copy_requested = pyqtSignal()
+    save_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ''
+        self._line_starts = [0]   # 每个逻辑行（按换行分段）的起始下标
+        self._row_offsets = [0]   # 每个逻辑行之前的显示行数（前缀和）
+        self._columns = 1         # 每个显示行的字符数
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_menu)
+
+    def text(self):
+        """完整结果"""
+        return self._text
+
+    def set_text(self, text):
+        """
+        设置要显示的文本
+        :param text: 文本（不会被复制或排版）
+        """
+        self._text = text
+        self._line_starts = [0] + [m.end() for m in _NEWLINE_RE.finditer(text)]
+        self._relayout()
+        self.verticalScrollBar().setValue(0)
+
+    def clear(self):
+        self.set_text('')
+
+    def _line_length(self, index):
+        """第index个逻辑行的长度（不含换行符）"""
+        start = self._line_starts[index]
+        if index + 1 < len(self._line_starts):
+            return self._line_starts[index + 1] - 1 - start
+        return len(self._text) - start
+
+    def _relayout(self):
+        """按当前宽度计算折行，只与逻辑行数有关，与文本长度无关"""
+        metrics = self.fontMetrics()
+        # 按全角字符宽度估算每行字符数，密文多为CJK等宽字符
+        self._columns = max(1, self.viewport().width() // max(1, metrics.horizontalAdvance('中')))
+        offsets = [0]
+        total = 0
+        columns = self._columns
+        for i in range(len(self._line_starts)):
+            total += max(1, -(-self._line_length(i) // columns))
+            offsets.append(total)
+        self._row_offsets = offsets
+        visible = max(1, self.viewport().height() // metrics.lineSpacing())
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, total - visible))
+        bar.setPageStep(visible)
+        bar.setSingleStep(1)
+        self.viewport().update()
+
+    def _row_text(self, row):
+        """第row个显示行的文本"""
+        line = bisect.bisect_right(self._row_offsets, row) - 1
+        if line >= len(self._line_starts):
+            return None
+        offset = (row - self._row_offsets[line]) * self._columns
+        length = self._line_length(line)
+        start = self._line_starts[line] + offset
+        return self._text[start:start + min(self._columns, length - offset)]
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._relayout()
+
+    def paintEvent(self, event):
+        from crypto.incremental import display_safe
+        painter = QPainter(self.viewport())
+        painter.setPen(self.palette().color(self.foregroundRole()))
+        metrics = QFontMetrics(self.font())
+        spacing = metrics.lineSpacing()
+        first = self.verticalScrollBar().value()
+        last_row = self._row_offsets[-1]
+        y = metrics.ascent()
+        for row in range(first, min(last_row, first + self.viewport().height() // spacing + 2)):
+            text = self._row_text(row)
+            if text is None:
+                break
+            painter.drawText(2, y, display_safe(text).replace('\t', ' '))
+            y += spacing
+
+    def _show_menu(self, pos):
+        menu = QMenu(self)
+        menu.addAction('复制全部', self.copy_requested.emit)
+        menu.addAction('保存到文件...', self.save_requested.emit)
+        menu.exec_(self.viewport().mapToGlobal(pos))
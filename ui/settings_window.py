@@ -9,7 +9,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont, QIcon
 from PyQt5.QtCore import Qt, pyqtSignal
 import os
-from crypto.key_transform import generate_random_key, validate_key
+from crypto.key_transform import check_key, validate_key
+from crypto.keygen import get_key_pool
 
 class SettingsWindow(QWidget):
     # 信号：设置已保存
@@ -18,6 +19,7 @@ class SettingsWindow(QWidget):
     def __init__(self, parent=None, current_settings=None):
         super().__init__(parent)
         self.current_settings = current_settings or {}
+        self.stats_panel = None
         self.init_ui()
         self.load_settings()
         
@@ -168,6 +170,9 @@ class SettingsWindow(QWidget):
         self.key_length_spin = QSpinBox()
         self.key_length_spin.setRange(8, 32)
         self.key_length_spin.setValue(16)
+        # 后台预先生成当前长度的密钥，点击生成按钮时直接取用
+        self.key_length_spin.valueChanged.connect(get_key_pool().prefill)
+        get_key_pool().prefill(self.key_length_spin.value())
         length_layout.addWidget(self.key_length_spin)
         length_layout.addWidget(QLabel('位'))
         length_layout.addStretch()
@@ -220,12 +225,34 @@ class SettingsWindow(QWidget):
         self.save_key_checkbox = QCheckBox('记住密钥设置（下次启动时自动加载）')
         layout.addWidget(self.save_key_checkbox)
         
+        # 全码位模式
+        self.full_unicode_checkbox = QCheckBox('全码位模式（emoji等字符可精确还原，与旧密文不兼容）')
+        layout.addWidget(self.full_unicode_checkbox)
+        
+        # 实时预览
+        self.live_preview_checkbox = QCheckBox('输入时实时预览密文（Unicode算法只重新加密修改的部分）')
+        layout.addWidget(self.live_preview_checkbox)
+        
         group.setLayout(layout)
         return group
     
+    def open_stats_panel(self):
+        """打开性能统计面板（首次打开时创建）"""
+        if self.stats_panel is None:
+            from .stats_panel import StatsPanel
+            self.stats_panel = StatsPanel(self)
+        self.stats_panel.show()
+        self.stats_panel.raise_()
+    
     def create_button_layout(self):
         """创建按钮布局"""
         layout = QHBoxLayout()
+        
+        # 性能统计面板
+        stats_btn = QPushButton('性能统计...')
+        stats_btn.setObjectName('cancel')
+        stats_btn.clicked.connect(self.open_stats_panel)
+        layout.addWidget(stats_btn)
         layout.addStretch()
         
         # 取消按钮
@@ -271,7 +298,7 @@ class SettingsWindow(QWidget):
     def generate_random_key(self):
         """生成随机密钥"""
         length = self.key_length_spin.value()
-        key = generate_random_key(length)
+        key = get_key_pool().get(length)
         self.key_input.setText(key)
         
         # 显示生成成功消息
@@ -293,6 +320,12 @@ class SettingsWindow(QWidget):
         save_key = self.current_settings.get('save_key', True)
         self.save_key_checkbox.setChecked(save_key)
         
+        full_unicode = self.current_settings.get('full_unicode', False)
+        self.full_unicode_checkbox.setChecked(full_unicode)
+        
+        live_preview = self.current_settings.get('live_preview', False)
+        self.live_preview_checkbox.setChecked(live_preview)
+        
         # 触发验证
         self.on_key_enabled_changed(Qt.Checked if key_enabled else Qt.Unchecked)
     
@@ -307,13 +340,17 @@ class SettingsWindow(QWidget):
             if not is_valid:
                 QMessageBox.warning(self, '密钥错误', f'密钥格式不正确：\n{error_msg}')
                 return
+            # 已校验的密钥，加解密时不再重复校验
+            key = check_key(key)
         
         # 收集设置
         settings = {
             'key_enabled': key_enabled,
             'key': key if key_enabled else '',
             'auto_copy': self.auto_copy_checkbox.isChecked(),
-            'save_key': self.save_key_checkbox.isChecked()
+            'save_key': self.save_key_checkbox.isChecked(),
+            'full_unicode': self.full_unicode_checkbox.isChecked(),
+            'live_preview': self.live_preview_checkbox.isChecked()
         }
         
         # 发送信号
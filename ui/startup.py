@@ -0,0 +1,59 @@
+# 启动耗时统计
+# main.py 最先导入本模块作为计时起点，之后在关键节点调用 mark() 记录耗时
+# 设置环境变量 AVATAR_STARTUP_TIMING=1 或命令行传入 --startup-time 时，头像显示后输出各节点耗时
+
+import os
+import sys
+import time
+
+ENV_FLAG = 'AVATAR_STARTUP_TIMING'
+
+_origin = time.perf_counter()
+_marks = []
+_hooks = []
+
+def mark(name):
+    """
+    记录一个启动节点
+    :param name: 节点名称
+    :return: 距计时起点的毫秒数
+    """
+    elapsed = (time.perf_counter() - _origin) * 1000
+    _marks.append((name, elapsed))
+    return elapsed
+
+def marks():
+    """
+    已记录的节点
+    :return: [(名称, 毫秒数), ...]
+    """
+    return list(_marks)
+
+def add_hook(callback):
+    """
+    注册启动完成回调，finish() 时以 marks() 的结果调用
+    :param callback: callback(marks)
+    """
+    _hooks.append(callback)
+
+def enabled(argv=None):
+    """是否需要输出启动耗时"""
+    argv = sys.argv if argv is None else argv
+    return bool(os.environ.get(ENV_FLAG)) or '--startup-time' in argv
+
+def finish(name='ready'):
+    """
+    记录最后一个节点并调用所有回调
+    :param name: 节点名称
+    """
+    mark(name)
+    result = marks()
+    for callback in _hooks:
+        callback(result)
+    return result
+
+def print_report(result, stream=None):
+    """按行输出各节点耗时"""
+    stream = stream or sys.stderr
+    for name, elapsed in result:
+        print(f"[startup] {name}: {elapsed:.1f} ms", file=stream)
@@ -0,0 +1,74 @@
+# 性能统计面板
+# 从设置窗口打开，显示 crypto.instrumentation 收集的各阶段耗时、处理量和密钥计划缓存命中率
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QPlainTextEdit, QPushButton
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtCore import Qt, QTimer
+
+from crypto import instrumentation
+
+# 面板可见时的自动刷新间隔（毫秒）
+REFRESH_INTERVAL = 1000
+
+class StatsPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('性能统计')
+        self.setWindowFlags(Qt.Window | Qt.WindowCloseButtonHint)
+        self.resize(640, 360)
+
+        self.enable_checkbox = QCheckBox('启用统计（关闭时几乎没有额外开销）')
+        self.enable_checkbox.setChecked(instrumentation.is_enabled())
+        self.enable_checkbox.toggled.connect(self.on_enable_toggled)
+
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        font.setPointSize(10)
+        self.view.setFont(font)
+
+        refresh_btn = QPushButton('刷新')
+        refresh_btn.clicked.connect(self.refresh)
+        reset_btn = QPushButton('重置')
+        reset_btn.clicked.connect(self.reset)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.enable_checkbox)
+        buttons.addStretch()
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(reset_btn)
+
+        layout = QVBoxLayout()
+        layout.addLayout(buttons)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+
+    def on_enable_toggled(self, checked):
+        if checked:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        self.refresh()
+
+    def refresh(self):
+        """重新读取统计"""
+        self.view.setPlainText(instrumentation.format_stats())
+
+    def reset(self):
+        instrumentation.reset_stats()
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.enable_checkbox.setChecked(instrumentation.is_enabled())
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()